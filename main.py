@@ -8,8 +8,9 @@ import json
 import requests
 import os
 import time
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import argparse
 
 
@@ -233,7 +234,6 @@ class CompetitiveIntel:
                     if body:
                         insights["raw_data"]["bodies"].append(body)
                     if cta:
-                        insights["cta_types"][cta] = insights["cta_types"].get(cta, 0) + 1
                         insights["raw_data"]["ctas"].append(cta)
                     if landing_page:
                         landing_pages_set.add(landing_page)
@@ -258,9 +258,7 @@ class CompetitiveIntel:
                 
                 # Platform analysis
                 platforms = ad.get("publisherPlatform", [])
-                for platform in platforms:
-                    insights["platform_distribution"][platform] = insights["platform_distribution"].get(platform, 0) + 1
-                    insights["raw_data"]["platforms"].append(platform)
+                insights["raw_data"]["platforms"].extend(platforms)
                 
                 # Performance indicators
                 if ad.get("isActive"):
@@ -271,6 +269,10 @@ class CompetitiveIntel:
                     days = total_time // (24 * 3600)
                     total_days += days
         
+        # Count CTAs and platforms in one pass over the collected raw data
+        insights["cta_types"] = dict(Counter(insights["raw_data"]["ctas"]))
+        insights["platform_distribution"] = dict(Counter(insights["raw_data"]["platforms"]))
+        
         # Calculate averages
         insights["performance_indicators"]["active_ads"] = active_count
         insights["performance_indicators"]["unique_headlines"] = len(headlines_set)
@@ -615,8 +617,9 @@ Focus on actionable intelligence for immediate competitive advantage."""
         print(f"💾 Report saved: {filename}")
         return filename
     
-    def run_analysis(self, brand_filter: Optional[str] = None) -> Tuple[str, Dict]:
-        """Run complete competitive analysis"""
+    def run_analysis(self, brand_filter: Optional[str] = None,
+                     on_section: Optional[Callable[[str], None]] = None) -> Tuple[str, Dict]:
+        """Run complete competitive analysis (on_section gets each brand's analysis as it finishes)"""
         print("🚀 Starting Competitive Intelligence Analysis...")
         
         # Filter brands if specified
@@ -655,6 +658,8 @@ Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
             
             # Add to report
             report += f"{analysis}\n\n---\n\n"
+            if on_section:
+                on_section(analysis)
         
         # Add summary footer
         report += f"""## 📊 Analysis Summary
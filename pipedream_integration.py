@@ -543,42 +543,42 @@ export("analysis_result", result)
         except Exception as e:
             return False, f"Error deleting workflow: {str(e)}"
 
-def get_oauth_instructions(service: str) -> str:
-    """Get service-specific OAuth setup instructions"""
+# Service-specific OAuth setup instructions (built once at import)
+OAUTH_INSTRUCTIONS = {
+    "slack": """
+    **Slack OAuth Setup:**
+    1. Go to [api.slack.com](https://api.slack.com/apps)
+    2. Create a new Slack app for your workspace
+    3. Add the following OAuth scopes:
+       - `chat:write` (to send messages)
+       - `channels:read` (to list channels)
+    4. Install the app to your workspace
+    5. Copy the OAuth token (starts with `xoxb-`)
+    """,
     
-    instructions = {
-        "slack": """
-        **Slack OAuth Setup:**
-        1. Go to [api.slack.com](https://api.slack.com/apps)
-        2. Create a new Slack app for your workspace
-        3. Add the following OAuth scopes:
-           - `chat:write` (to send messages)
-           - `channels:read` (to list channels)
-        4. Install the app to your workspace
-        5. Copy the OAuth token (starts with `xoxb-`)
-        """,
-        
-        "discord": """
-        **Discord OAuth Setup:**
-        1. Go to [discord.com/developers/applications](https://discord.com/developers/applications)
-        2. Create a new application
-        3. Go to "Bot" section and create a bot
-        4. Copy the bot token
-        5. Add bot to your Discord server with appropriate permissions:
-           - Send Messages
-           - Read Message History
-        """,
-        
-        "teams": """
-        **Microsoft Teams Setup:**
-        1. Go to [Azure Portal](https://portal.azure.com)
-        2. Register a new application
-        3. Configure API permissions for Microsoft Graph:
-           - `ChannelMessage.Send`
-           - `Team.ReadBasic.All`
-        4. Generate client secret
-        5. Configure webhook connector in Teams channel
-        """
-    }
+    "discord": """
+    **Discord OAuth Setup:**
+    1. Go to [discord.com/developers/applications](https://discord.com/developers/applications)
+    2. Create a new application
+    3. Go to "Bot" section and create a bot
+    4. Copy the bot token
+    5. Add bot to your Discord server with appropriate permissions:
+       - Send Messages
+       - Read Message History
+    """,
     
-    return instructions.get(service, "OAuth setup instructions not available for this service.")
\ No newline at end of file
+    "teams": """
+    **Microsoft Teams Setup:**
+    1. Go to [Azure Portal](https://portal.azure.com)
+    2. Register a new application
+    3. Configure API permissions for Microsoft Graph:
+       - `ChannelMessage.Send`
+       - `Team.ReadBasic.All`
+    4. Generate client secret
+    5. Configure webhook connector in Teams channel
+    """
+}
+
+def get_oauth_instructions(service: str) -> str:
+    """Get service-specific OAuth setup instructions"""
+    return OAUTH_INSTRUCTIONS.get(service, "OAuth setup instructions not available for this service.")
\ No newline at end of file
@@ -1,13 +1,18 @@
 import streamlit as st
 import json
 import os
+import heapq
+import tempfile
+import requests
 from datetime import datetime
+from functools import partial
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
 from main import CompetitiveIntel
-import glob
-import plotly.express as px
 import plotly.graph_objects as go
+from plotly.colors import sample_colorscale
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from pipedream_integration import PipedreamIntegration, get_oauth_instructions
 
 # Page config
@@ -17,8 +22,8 @@ st.set_page_config(
     layout="wide"
 )
 
-# Load CSS for better styling
-st.markdown("""
+# Static CSS for better styling
+_CSS = """
 <style>
 .main-header {
     font-size: 2.5rem;
@@ -84,19 +89,91 @@ div[data-testid="metric-container"] {
     margin-bottom: 1rem;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Streamlit drops elements that aren't re-emitted on a rerun, so the style block
+# has to be sent every run - keep it as a constant rather than rebuilding it
+st.markdown(_CSS, unsafe_allow_html=True)
+
+# Static page and sidebar banners (also re-emitted every run, see above)
+_APP_HEADER = """
+<div class="step-header">
+    <h1 style="margin: 0; font-size: 2.5rem;">🎯 Competitive Intelligence Tool</h1>
+    <p style="margin: 0.5rem 0 0 0; opacity: 0.9; font-size: 1.1rem;">Automate competitor analysis with AI-powered insights</p>
+</div>
+"""
+
+_SIDEBAR_HEADER = """
+<div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+            color: white; 
+            padding: 1rem; 
+            border-radius: 8px; 
+            margin-bottom: 1rem;
+            text-align: center;">
+    <h2 style="margin: 0;">🎯 Competitive Intel</h2>
+    <p style="margin: 0.5rem 0 0 0; opacity: 0.9;">AI-powered analysis</p>
+</div>
+"""
+
+# Session-state API keys: (session key, service label)
+SESSION_API_KEYS = (
+    ("temp_apify_key", "Apify"),
+    ("temp_claude_key", "Claude"),
+)
+
+# Config entries required to run analysis: (section, key, label)
+REQUIRED_API_CONFIG = (
+    ("apify", "api_token", "Apify API token"),
+    ("claude", "api_key", "Claude API key"),
+)
+
+# Error messages with their troubleshooting tips, rendered as one element each
+ANALYSIS_ERROR_HELP = """❌ Analysis error: {error}
+
+**Common issues:**
+- Invalid API keys
+- Insufficient API credits
+- Network connectivity issues"""
+
+MISSING_CONFIG_HELP = """❌ Missing configuration: {missing}
+
+**Quick Fix Options:**
+1. **New users**: Go to '🔑 Quick Setup' to enter your API keys
+2. **Existing users**: Configure keys in 'Settings' page"""
+
+@st.cache_resource(show_spinner=False)
+def _secrets_available():
+    """Probe st.secrets once per process - secrets don't change while the app runs"""
+    return hasattr(st, 'secrets') and 'config' in st.secrets
+
+def _plain_dict(value):
+    """Recursively convert a secrets section into plain dicts"""
+    if hasattr(value, 'keys'):
+        return {key: _plain_dict(value[key]) for key in value.keys()}
+    return value
+
+@st.cache_resource(show_spinner=False)
+def _secrets_config():
+    """Convert secrets config to a regular dict once (shared - callers must not mutate it)"""
+    return _plain_dict(st.secrets.config)
 
 def load_config():
     """Load configuration from file or Streamlit secrets"""
     # Try Streamlit secrets first (for cloud deployment)
-    if hasattr(st, 'secrets') and 'config' in st.secrets:
-        # Convert secrets to a regular dict to avoid read-only issues
-        config = {}
-        for key in st.secrets.config:
-            config[key] = dict(st.secrets.config[key])
-        return config
+    if is_using_secrets():
+        # Converted to a regular dict to avoid read-only issues
+        return _secrets_config()
     
     # Fall back to local config file
+    try:
+        mtime = os.stat("config.json").st_mtime_ns
+    except OSError:
+        mtime = None
+    return _load_config_file(mtime)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _load_config_file(mtime: Optional[int]):
+    """Parse config.json (cached per file mtime, so outside edits are picked up on the next rerun)"""
     try:
         with open("config.json", "r") as f:
             return json.load(f)
@@ -117,118 +194,278 @@ def load_config():
         }
         return default_config
 
+def _write_config(config):
+    """Write configuration to file (skipped when nothing changed)"""
+    contents = json.dumps(config, indent=2)
+    try:
+        with open("config.json", "r") as f:
+            if f.read() == contents:
+                return
+    except FileNotFoundError:
+        pass
+    
+    # Swap in a fully written file so a crash can't leave a truncated config
+    # (a unique temp name, so sessions saving at the same time never share one)
+    config_dir = os.path.dirname(os.path.abspath("config.json"))
+    tmp = tempfile.NamedTemporaryFile("w", dir=config_dir, prefix="config.json.", suffix=".tmp", delete=False)
+    try:
+        with tmp:
+            tmp.write(contents)
+        os.replace(tmp.name, "config.json")
+    except OSError:
+        os.unlink(tmp.name)
+        raise
+    # Clear only once the new file is on disk so no rerun can re-cache stale data
+    _load_config_file.clear()
+
 def save_config(config):
     """Save configuration to file"""
     # For cloud deployment, show a warning about persistence
-    if hasattr(st, 'secrets') and 'config' in st.secrets:
+    if is_using_secrets():
         st.warning("⚠️ Running on Streamlit Cloud - changes won't persist. Use secrets.toml for permanent config.")
         return False
     
+    # The file is tiny - write it here so callers only report success once it's on disk
     try:
-        with open("config.json", "w") as f:
-            json.dump(config, f, indent=2)
+        _write_config(config)
         return True
     except Exception as e:
         st.error(f"Failed to save config: {str(e)}")
         return False
 
+def save_brand(config: Dict, brand_name: str, brand_config: Optional[Dict]) -> bool:
+    """Save a copy of config with one brand added/updated, or removed when brand_config is None"""
+    # Copy only the two dicts that change - other sections and brand entries are shared
+    # with the loaded config but only ever replaced here, never modified
+    brands = dict(config.get("brands", {}))
+    new_config = {**config, "brands": brands}
+    if brand_config is None:
+        brands.pop(brand_name, None)
+    else:
+        brands[brand_name] = brand_config
+    return save_config(new_config)
+
 def is_using_secrets():
     """Check if we're using Streamlit secrets"""
-    return hasattr(st, 'secrets') and 'config' in st.secrets
+    return _secrets_available()
 
 def get_session_config(base_config):
     """Get configuration with session-based API keys if available"""
     config = dict(base_config)
+    # Analysis runs toggle notifications per run - don't write into the shared config
+    config['notifications'] = dict(base_config.get('notifications', {}))
     
     # Override with session keys if available
-    if 'temp_apify_key' in st.session_state and st.session_state.temp_apify_key:
-        config['apify'] = {'api_token': st.session_state.temp_apify_key}
-    if 'temp_claude_key' in st.session_state and st.session_state.temp_claude_key:
-        config['claude'] = {'api_key': st.session_state.temp_claude_key}
+    apify_key = st.session_state.get('temp_apify_key')
+    claude_key = st.session_state.get('temp_claude_key')
+    if apify_key:
+        config['apify'] = {'api_token': apify_key}
+    if claude_key:
+        config['claude'] = {'api_key': claude_key}
+    
+    # Session brands sit on top of the configured ones (new dict - base_config is left alone)
+    quick_brands = st.session_state.get('quick_brands')
+    if quick_brands:
+        config['brands'] = {**base_config.get('brands', {}), **quick_brands}
     
     return config
 
-def create_media_distribution_chart(insights: Dict) -> go.Figure:
+@st.cache_resource
+def get_pipedream() -> PipedreamIntegration:
+    """Shared tokenless PipedreamIntegration for all sessions (service list, OAuth links, templates)"""
+    # Never set .api_token on it - workflow creation builds its own client with the user's token
+    return PipedreamIntegration()
+
+def go_to_page(page: str):
+    """Button callback: switch the sidebar page on the rerun the click already triggers"""
+    st.session_state._force_page = page
+
+def go_to_step(step: int):
+    """Button callback: jump to a wizard step on the rerun the click already triggers"""
+    go_to_page(STEP_PAGES[step - 1])
+
+def reset_analysis(clear_results: bool = True, clear_custom_brands: bool = False):
+    """Button callback: clear the brand selection (and results) and go back to Step 2"""
+    state = st.session_state
+    state.selected_brands = []
+    state.pop("example_brand_picker", None)  # Otherwise the picker re-selects the old brands
+    if clear_custom_brands:
+        state.pop("quick_brands", None)
+    if clear_results:
+        state.pop("analysis_insights", None)
+        state.pop("last_analysis_report", None)
+    go_to_step(2)
+
+def key_placeholder(state_key: str, hint: str) -> str:
+    """Placeholder for an API key input - a saved key is never echoed back into the widget"""
+    if st.session_state.get(state_key):
+        return "Saved for this session - enter a new key to replace it"
+    return hint
+
+def session_status() -> SimpleNamespace:
+    """Snapshot which session keys and brands are set, read once per render"""
+    state = st.session_state
+    return SimpleNamespace(
+        apify=bool(state.get('temp_apify_key')),
+        claude=bool(state.get('temp_claude_key')),
+        brands=bool(state.get('quick_brands'))
+    )
+
+@st.cache_resource
+def _analysis_runner():
+    """Background workers for analyses, so a run survives reruns and page changes"""
+    return ThreadPoolExecutor(max_workers=4)
+
+def _run_analysis_job(brand_filter: Optional[str], config: Dict, on_section) -> Tuple[str, Dict]:
+    """Worker: run one analysis on its own CompetitiveIntel, so jobs never share an HTTP session"""
+    intel = CompetitiveIntel()
+    intel.config = config
+    with intel.session:
+        return intel.run_analysis(brand_filter, on_section=on_section)
+
+def start_analysis(brand_filter: Optional[str], config: Dict):
+    """Start an analysis in the background - each brand's section is collected as it finishes"""
+    sections = []
+    future = _analysis_runner().submit(_run_analysis_job, brand_filter, config, sections.append)
+    # Remember the page that started it - only that page shows the outcome
+    st.session_state.analysis_job = SimpleNamespace(future=future, sections=sections,
+                                                    page=st.session_state.get('current_page'))
+
+@st.fragment(run_every=2)
+def show_analysis_progress():
+    """Stream the running analysis' finished sections, then rerun the page to pick up the results"""
+    job = st.session_state.get('analysis_job')
+    if job is None or job.future.done():
+        st.rerun()
+    with st.status("🔄 Running competitive intelligence analysis...", expanded=True):
+        st.write("This may take 1-2 minutes per brand - you can keep using the app meanwhile.")
+        for section in list(job.sections):
+            st.markdown(section)
+
+@st.fragment(run_every=2)
+def watch_analysis():
+    """Sidebar note while an analysis runs on pages without their own progress view - reruns the app once it's done"""
+    job = st.session_state.get('analysis_job')
+    if job is None or job.future.done():
+        st.rerun()
+    st.caption(f"⏳ Analysis running in the background ({len(job.sections)} brand(s) done)")
+
+def get_active_brands(brands: Dict) -> List[str]:
+    """Get names of active brands in a single pass"""
+    return [name for name, brand_config in brands.items() if brand_config.get("active", True)]
+
+MEDIA_COLORS = {
+    'video': '#FF6B6B',
+    'image': '#4ECDC4',
+    'text_only': '#45B7D1'
+}
+
+# Bar palettes sampled once at import instead of Plotly resolving a colorscale per chart
+BAR_PALETTES = {name: sample_colorscale(name, 32) for name in ("Viridis", "Blues", "Oranges")}
+
+def bar_colors(values, palette: str) -> List[str]:
+    """Map bar values onto a precomputed palette"""
+    colors = BAR_PALETTES[palette]
+    top = max(values)
+    return [colors[int(value * (len(colors) - 1) / top)] for value in values]
+
+# Figures are shared between reruns (cache_resource) since unpickling a cache_data copy
+# re-runs Plotly validation (~10ms per figure) - callers must not modify them, so titles are passed in
+@st.cache_resource(max_entries=50, show_spinner=False)
+def create_media_distribution_chart(insights: Dict, title: str = "📱 Media Format Distribution") -> go.Figure:
     """Create media distribution pie chart"""
     media_data = insights.get('media_distribution', {})
     if not any(media_data.values()):
         return None
     
-    fig = px.pie(
+    labels = list(media_data.keys())
+    fig = go.Figure(go.Pie(
         values=list(media_data.values()),
-        names=list(media_data.keys()),
-        title="📱 Media Format Distribution",
-        color_discrete_map={
-            'video': '#FF6B6B',
-            'image': '#4ECDC4', 
-            'text_only': '#45B7D1'
-        }
-    )
-    fig.update_traces(textposition='inside', textinfo='percent+label')
+        labels=labels,
+        marker=dict(colors=[MEDIA_COLORS.get(label, '#96CEB4') for label in labels]),
+        textposition='inside',
+        textinfo='percent+label'
+    ))
+    fig.update_layout(title=title)
     return fig
 
-def create_theme_analysis_chart(insights: Dict) -> go.Figure:
+@st.cache_resource(max_entries=50, show_spinner=False)
+def create_theme_analysis_chart(insights: Dict, title: str = "🎯 Messaging Themes Distribution") -> go.Figure:
     """Create theme analysis bar chart"""
-    themes = insights.get('themes', {})
-    if not any(themes.values()):
-        return None
-    
     # Filter out zero values and sort by count
-    filtered_themes = {k: v for k, v in themes.items() if v > 0}
-    if not filtered_themes:
+    themes = [(k, v) for k, v in insights.get('themes', {}).items() if v > 0]
+    if not themes:
         return None
     
-    sorted_themes = dict(sorted(filtered_themes.items(), key=lambda x: x[1], reverse=True))
+    themes.sort(key=lambda x: x[1], reverse=True)
+    names, values = zip(*themes)
     
-    fig = px.bar(
-        x=list(sorted_themes.values()),
-        y=list(sorted_themes.keys()),
+    fig = go.Figure(go.Bar(
+        x=list(values),
+        y=list(names),
         orientation='h',
-        title="🎯 Messaging Themes Distribution",
-        labels={'x': 'Number of Ads', 'y': 'Theme'},
-        color=list(sorted_themes.values()),
-        color_continuous_scale='Viridis'
-    )
-    fig.update_layout(showlegend=False)
+        marker=dict(color=bar_colors(values, 'Viridis'))
+    ))
+    fig.update_layout(title=title, xaxis_title="Number of Ads", yaxis_title="Theme", showlegend=False)
     return fig
 
+@st.cache_resource(max_entries=50, show_spinner=False)
 def create_platform_distribution_chart(insights: Dict) -> go.Figure:
     """Create platform distribution chart"""
     platforms = insights.get('platform_distribution', {})
     if not any(platforms.values()):
         return None
     
-    fig = px.bar(
+    values = list(platforms.values())
+    fig = go.Figure(go.Bar(
         x=list(platforms.keys()),
-        y=list(platforms.values()),
-        title="📊 Platform Distribution",
-        labels={'x': 'Platform', 'y': 'Number of Ads'},
-        color=list(platforms.values()),
-        color_continuous_scale='Blues'
-    )
+        y=values,
+        marker=dict(color=bar_colors(values, 'Blues'))
+    ))
+    fig.update_layout(title="📊 Platform Distribution", xaxis_title="Platform", yaxis_title="Number of Ads")
     return fig
 
+@st.cache_resource(max_entries=50, show_spinner=False)
 def create_cta_analysis_chart(insights: Dict) -> go.Figure:
     """Create CTA analysis chart"""
-    ctas = insights.get('cta_types', {})
-    if not any(ctas.values()):
+    ctas = [(k, v) for k, v in insights.get('cta_types', {}).items() if v]
+    if not ctas:
         return None
     
-    # Get top 10 CTAs
-    sorted_ctas = dict(sorted(ctas.items(), key=lambda x: x[1], reverse=True)[:10])
+    # Get top 10 CTAs without sorting the whole list
+    names, values = zip(*heapq.nlargest(10, ctas, key=lambda x: x[1]))
     
-    fig = px.bar(
-        x=list(sorted_ctas.values()),
-        y=list(sorted_ctas.keys()),
+    fig = go.Figure(go.Bar(
+        x=list(values),
+        y=list(names),
         orientation='h',
-        title="💬 Top Call-to-Action Types",
-        labels={'x': 'Frequency', 'y': 'CTA Text'},
-        color=list(sorted_ctas.values()),
-        color_continuous_scale='Oranges'
-    )
-    fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+        marker=dict(color=bar_colors(values, 'Oranges'))
+    ))
+    fig.update_layout(title="💬 Top Call-to-Action Types", xaxis_title="Frequency", yaxis_title="CTA Text",
+                      yaxis={'categoryorder': 'total ascending'})
     return fig
 
+def sum_brand_counts(insights: Dict[str, Dict], key: str) -> Dict[str, int]:
+    """Sum one per-brand count dict across all brands"""
+    counts = pd.DataFrame.from_dict({brand: brand_insights.get(key, {}) for brand, brand_insights in insights.items()}, orient='index')
+    return counts.fillna(0).sum(axis=0).astype(int).to_dict()
+
+@st.cache_data(max_entries=20, show_spinner=False)
+def aggregate_insights(insights: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Combine per-brand insights into one set of totals for the dashboard charts"""
+    total_media = {"video": 0, "image": 0, "text_only": 0, **sum_brand_counts(insights, 'media_distribution')}
+    total_themes = {"science": 0, "convenience": 0, "energy": 0, "health": 0, "premium": 0, "social_proof": 0, "urgency": 0,
+                    **sum_brand_counts(insights, 'themes')}
+    performance = sum_brand_counts(insights, 'performance_indicators')
+    return {
+        'media_distribution': total_media,
+        'themes': total_themes,
+        'platform_distribution': sum_brand_counts(insights, 'platform_distribution'),
+        'cta_types': sum_brand_counts(insights, 'cta_types'),
+        'performance_indicators': {key: performance.get(key, 0) for key in ("total_ads", "active_ads", "unique_headlines", "unique_landing_pages")}
+    }
+
+@st.fragment
 def show_insights_dashboard(insights: Dict[str, Dict]):
     """Show interactive insights dashboard"""
     st.markdown("## 📊 Visual Insights Dashboard")
@@ -237,45 +474,9 @@ def show_insights_dashboard(insights: Dict[str, Dict]):
         st.info("Run an analysis to see visual insights!")
         return
     
-    # Aggregate insights across all brands
-    total_media = {"video": 0, "image": 0, "text_only": 0}
-    total_themes = {"science": 0, "convenience": 0, "energy": 0, "health": 0, "premium": 0, "social_proof": 0, "urgency": 0}
-    total_platforms = {}
-    total_ctas = {}
-    total_performance = {"total_ads": 0, "active_ads": 0, "unique_headlines": 0, "unique_landing_pages": 0}
-    
-    for brand_name, brand_insights in insights.items():
-        # Aggregate media distribution
-        for media_type, count in brand_insights.get('media_distribution', {}).items():
-            total_media[media_type] += count
-        
-        # Aggregate themes
-        for theme, count in brand_insights.get('themes', {}).items():
-            total_themes[theme] += count
-        
-        # Aggregate platforms
-        for platform, count in brand_insights.get('platform_distribution', {}).items():
-            total_platforms[platform] = total_platforms.get(platform, 0) + count
-        
-        # Aggregate CTAs
-        for cta, count in brand_insights.get('cta_types', {}).items():
-            total_ctas[cta] = total_ctas.get(cta, 0) + count
-        
-        # Aggregate performance
-        perf = brand_insights.get('performance_indicators', {})
-        total_performance['total_ads'] += perf.get('total_ads', 0)
-        total_performance['active_ads'] += perf.get('active_ads', 0)
-        total_performance['unique_headlines'] += perf.get('unique_headlines', 0)
-        total_performance['unique_landing_pages'] += perf.get('unique_landing_pages', 0)
-    
-    # Create aggregated insights for charts
-    aggregated_insights = {
-        'media_distribution': total_media,
-        'themes': total_themes,
-        'platform_distribution': total_platforms,
-        'cta_types': total_ctas,
-        'performance_indicators': total_performance
-    }
+    # Aggregate insights across all brands (cached - reruns with the same insights skip the pandas work)
+    aggregated_insights = aggregate_insights(insights)
+    total_performance = aggregated_insights['performance_indicators']
     
     # Display key metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -318,75 +519,188 @@ def show_insights_dashboard(insights: Dict[str, Dict]):
     if len(insights) > 1:
         st.markdown("### 🏢 Brand-by-Brand Breakdown")
         
-        for brand_name, brand_insights in insights.items():
-            with st.expander(f"📊 {brand_name} Detailed Insights"):
-                perf = brand_insights.get('performance_indicators', {})
-                
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric(f"{brand_name} Total Ads", perf.get('total_ads', 0))
-                with col2:
-                    st.metric(f"{brand_name} Active Ads", perf.get('active_ads', 0))
-                with col3:
-                    avg_days = perf.get('avg_days_running', 0)
-                    st.metric(f"Avg Days Running", f"{avg_days} days")
-                
-                # Individual brand charts
-                brand_col1, brand_col2 = st.columns(2)
-                
-                with brand_col1:
-                    brand_media_fig = create_media_distribution_chart(brand_insights)
-                    if brand_media_fig:
-                        brand_media_fig.update_layout(title=f"{brand_name} - Media Distribution")
-                        st.plotly_chart(brand_media_fig, use_container_width=True)
-                
-                with brand_col2:
-                    brand_theme_fig = create_theme_analysis_chart(brand_insights)
-                    if brand_theme_fig:
-                        brand_theme_fig.update_layout(title=f"{brand_name} - Messaging Themes")
-                        st.plotly_chart(brand_theme_fig, use_container_width=True)
-
-def get_recent_reports():
-    """Get list of recent reports"""
+        # One table for the per-brand numbers, charts for the selected brand below
+        summary = pd.DataFrame([
+            {
+                "Brand": brand_name,
+                "Total Ads": perf.get('total_ads', 0),
+                "Active Ads": perf.get('active_ads', 0),
+                "Avg Days Running": perf.get('avg_days_running', 0)
+            }
+            for brand_name, brand_insights in insights.items()
+            for perf in [brand_insights.get('performance_indicators', {})]
+        ])
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+        
+        # Charts for one brand at a time - picking another only reruns this fragment
+        brand_name = st.selectbox("📊 Detailed insights for", list(insights), key="insights_brand_detail")
+        brand_insights = insights[brand_name]
+        brand_col1, brand_col2 = st.columns(2)
+        
+        with brand_col1:
+            brand_media_fig = create_media_distribution_chart(brand_insights, f"{brand_name} - Media Distribution")
+            if brand_media_fig:
+                st.plotly_chart(brand_media_fig, use_container_width=True)
+        
+        with brand_col2:
+            brand_theme_fig = create_theme_analysis_chart(brand_insights, f"{brand_name} - Messaging Themes")
+            if brand_theme_fig:
+                st.plotly_chart(brand_theme_fig, use_container_width=True)
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _scan_recent_reports(dir_mtime_ns: int):
+    """Scan reports directory (cached until the directory changes)"""
+    try:
+        # Single directory pass - DirEntry caches the stat result
+        with os.scandir("reports") as entries:
+            reports = [(entry.path, entry.name, entry.stat().st_mtime) for entry in entries
+                       if entry.name.endswith(".md") and entry.is_file()]
+        # Format the timestamps here so reruns reuse them
+        return [(path, name, mtime, datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M'))
+                for path, name, mtime in heapq.nlargest(10, reports, key=lambda report: report[2])]  # 10 most recent
+    except OSError:
+        return []
+
+@st.cache_data(ttl=300, max_entries=50, show_spinner=False)
+def read_report_preview(report_path: str, mtime: float) -> str:
+    """Read the first 500 characters of a report (mtime in the key invalidates edited files)"""
+    with open(report_path, "r") as f:
+        # One extra character tells us whether the preview was truncated
+        return f.read(501)
+
+def clear_reports_cache():
+    """Drop the cached report listing"""
+    # The mtime key already catches new files; this also covers filesystems
+    # with coarse mtime resolution where two runs can share a timestamp
+    _scan_recent_reports.clear()
+
+def _reports_dir_mtime_ns():
+    """Get reports directory mtime (changes whenever a report is added or removed)"""
     try:
-        reports = glob.glob("reports/*.md")
-        reports.sort(key=os.path.getmtime, reverse=True)
-        return reports[:10]  # Return 10 most recent
-    except:
+        return os.stat("reports").st_mtime_ns
+    except OSError:
+        return None
+
+@st.cache_data(ttl=300, max_entries=20, show_spinner=False)
+def read_report(report_path: str, mtime: float) -> str:
+    """Read full report content (mtime in the key invalidates edited files)"""
+    with open(report_path, "r") as f:
+        return f.read()
+
+def get_recent_reports() -> List[Tuple[str, str, float, str]]:
+    """Get list of recent reports as (path, filename, mtime, modified) tuples"""
+    dir_mtime_ns = _reports_dir_mtime_ns()
+    if dir_mtime_ns is None:
         return []
+    return _scan_recent_reports(dir_mtime_ns)
+
+LAST_ANALYSIS_PATH = "reports/last_analysis.json"
+
+def store_analysis(report: str, insights: Dict):
+    """Keep the latest analysis in session state and, for local installs, on disk"""
+    st.session_state.analysis_insights = insights
+    st.session_state.last_analysis_report = report
+    # Shared deployments keep results per session only - other users must not see them
+    if is_using_secrets():
+        return
+    try:
+        os.makedirs("reports", exist_ok=True)
+        with open(LAST_ANALYSIS_PATH + ".tmp", "w") as f:
+            json.dump({"report": report, "insights": insights}, f, default=str)
+        os.replace(LAST_ANALYSIS_PATH + ".tmp", LAST_ANALYSIS_PATH)
+    except OSError:
+        pass  # Results are still in session state
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def _load_last_analysis(mtime: int) -> Optional[Dict]:
+    """Read the saved analysis (cached per file mtime)"""
+    try:
+        with open(LAST_ANALYSIS_PATH, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def restore_last_analysis():
+    """Reload the last saved analysis once per session so a page reload doesn't lose it"""
+    state = st.session_state
+    if is_using_secrets() or state.get("analysis_restored"):
+        return
+    state.analysis_restored = True
+    if "analysis_insights" in state:
+        return
+    try:
+        mtime = os.stat(LAST_ANALYSIS_PATH).st_mtime_ns
+    except OSError:
+        return
+    saved = _load_last_analysis(mtime)
+    if saved and saved.get("insights"):
+        state.analysis_insights = saved["insights"]
+        state.last_analysis_report = saved.get("report", "")
+
+def collect_finished_analysis():
+    """Store a finished background analysis and keep its outcome for the page that started it"""
+    job = st.session_state.get('analysis_job')
+    if job is None or not job.future.done():
+        return
+    del st.session_state.analysis_job
+    clear_reports_cache()  # A new report may have been saved
+    report = insights = error = None
+    try:
+        result = job.future.result()
+    except Exception as e:
+        error = str(e)
+    else:
+        # run_analysis returns "" instead of (report, insights) when no brand is active or matches
+        if isinstance(result, tuple):
+            report, insights = result
+    no_brands = error is None and report is None
+    if report:
+        # Stored here rather than on the run page, so the next steps unlock wherever the user is
+        store_analysis(report, insights)
+    st.session_state.analysis_outcome = SimpleNamespace(report=report, insights=insights, error=error,
+                                                        no_brands=no_brands, page=job.page)
+    # Storing the results unlocks more pages, which would reset the page picker - keep a user
+    # who is watching the run on that page so they see its outcome
+    if job.page is not None and st.session_state.get('current_page') == job.page:
+        st.session_state._force_page = job.page
+
+# Sidebar pages - the numbered steps unlock in order as setup progresses
+STEP_PAGES = (
+    "1️⃣ Step 1: Enter API Keys",
+    "2️⃣ Step 2: Select Brands",
+    "3️⃣ Step 3: Run Analysis",
+    "4️⃣ Step 4: View Results",
+    "5️⃣ Step 5: Setup Automation",
+)
+# Pages the setup stages unlock on their own - the rest need "Show All Pages"
+STAGE_PAGES = STEP_PAGES + ("📈 Visual Insights", "📄 View Reports")
+ALL_PAGES = STEP_PAGES + ("🎯 Brand Management", "📈 Visual Insights", "📄 View Reports")
+# URL-safe names for ?page= deep links, e.g. "step-3-run-analysis"
+PAGE_SLUGS = {page: page.split(" ", 1)[1].lower().replace(":", "").replace(" ", "-") for page in ALL_PAGES}
+PAGES_BY_SLUG = {slug: page for page, slug in PAGE_SLUGS.items()}
 
 def main():
-    st.markdown("""
-    <div class="step-header">
-        <h1 style="margin: 0; font-size: 2.5rem;">🎯 Competitive Intelligence Tool</h1>
-        <p style="margin: 0.5rem 0 0 0; opacity: 0.9; font-size: 1.1rem;">Automate competitor analysis with AI-powered insights</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_APP_HEADER, unsafe_allow_html=True)
     
     # Load config
     config = load_config()
     if not config:
         return
     
+    # Pick up the last saved analysis after a page reload
+    restore_last_analysis()
+    
+    # Pick up a background analysis that finished since the last run (before the stage is worked out)
+    collect_finished_analysis()
+    
     # Check if user has completed setup steps
-    has_api_keys = ('temp_apify_key' in st.session_state and st.session_state.temp_apify_key) and \
-                   ('temp_claude_key' in st.session_state and st.session_state.temp_claude_key)
-    has_brands = ('selected_brands' in st.session_state and st.session_state.selected_brands) or \
-                 ('quick_brands' in st.session_state and st.session_state.quick_brands)
-    has_completed_analysis = 'analysis_insights' in st.session_state and st.session_state.analysis_insights
+    state = st.session_state
+    has_api_keys = bool(state.get('temp_apify_key')) and bool(state.get('temp_claude_key'))
+    has_brands = bool(state.get('selected_brands')) or bool(state.get('quick_brands'))
+    has_completed_analysis = bool(state.get('analysis_insights'))
     
     # Sidebar for navigation with step progress
-    st.sidebar.markdown("""
-    <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                color: white; 
-                padding: 1rem; 
-                border-radius: 8px; 
-                margin-bottom: 1rem;
-                text-align: center;">
-        <h2 style="margin: 0;">🎯 Competitive Intel</h2>
-        <p style="margin: 0.5rem 0 0 0; opacity: 0.9;">AI-powered analysis</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.sidebar.markdown(_SIDEBAR_HEADER, unsafe_allow_html=True)
     
     # Progress indicator
     st.sidebar.markdown("### 📊 Setup Progress")
@@ -404,92 +718,78 @@ def main():
     {step5_status} **Step 5**: Setup Automation  
     """)
     
-    # Navigation based on setup status
-    if not has_api_keys:
-        # Force to Step 1 if no API keys
-        available_pages = ["1️⃣ Step 1: Enter API Keys"]
-        default_page = "1️⃣ Step 1: Enter API Keys"
-    elif not has_brands:
-        # Step 1 complete, show Step 2
-        available_pages = [
-            "1️⃣ Step 1: Enter API Keys",
-            "2️⃣ Step 2: Select Brands"
-        ]
-        default_page = "2️⃣ Step 2: Select Brands"
-    elif not has_completed_analysis:
-        # Steps 1-3 available
-        available_pages = [
-            "1️⃣ Step 1: Enter API Keys",
-            "2️⃣ Step 2: Select Brands", 
-            "3️⃣ Step 3: Run Analysis"
-        ]
-        default_page = "3️⃣ Step 3: Run Analysis"
+    # Navigation based on setup status: each completed stage unlocks the next step
+    stage = 0 if not has_api_keys else 1 if not has_brands else 2 if not has_completed_analysis else 3
+    if stage < 3:
+        available_pages = STEP_PAGES[:stage + 1]
+        default_page = STEP_PAGES[stage]
     else:
         # All steps available including results and automation
-        available_pages = [
-            "1️⃣ Step 1: Enter API Keys",
-            "2️⃣ Step 2: Select Brands", 
-            "3️⃣ Step 3: Run Analysis",
-            "4️⃣ Step 4: View Results",
-            "5️⃣ Step 5: Setup Automation",
-            "📈 Visual Insights",
-            "📄 View Reports"
-        ]
-        default_page = "4️⃣ Step 4: View Results"
+        available_pages = STAGE_PAGES
+        default_page = STEP_PAGES[3]
     
     # Add advanced options for experienced users
     st.sidebar.markdown("---")
     show_advanced = st.sidebar.checkbox("🔧 Show All Pages", help="Access all features directly")
     
     if show_advanced:
-        available_pages = [
-            "1️⃣ Step 1: Enter API Keys",
-            "2️⃣ Step 2: Select Brands", 
-            "3️⃣ Step 3: Run Analysis",
-            "4️⃣ Step 4: View Results",
-            "5️⃣ Step 5: Setup Automation",
-            "🎯 Brand Management", 
-            "📈 Visual Insights",
-            "📄 View Reports"
-        ]
-    
-    # Handle forced navigation states
-    if 'force_step_1' in st.session_state and st.session_state.force_step_1:
-        if "1️⃣ Step 1: Enter API Keys" in available_pages:
-            default_page = "1️⃣ Step 1: Enter API Keys"
-            del st.session_state.force_step_1  # Clear the flag
-    
-    if 'force_step_2' in st.session_state and st.session_state.force_step_2:
-        if "2️⃣ Step 2: Select Brands" in available_pages:
-            default_page = "2️⃣ Step 2: Select Brands"
-            del st.session_state.force_step_2  # Clear the flag
-    
-    if 'force_step_3' in st.session_state and st.session_state.force_step_3:
-        if "3️⃣ Step 3: Run Analysis" in available_pages:
-            default_page = "3️⃣ Step 3: Run Analysis"
-            del st.session_state.force_step_3  # Clear the flag
-    
-    if 'force_step_4' in st.session_state and st.session_state.force_step_4:
-        if "4️⃣ Step 4: View Results" in available_pages:
-            default_page = "4️⃣ Step 4: View Results"
-            del st.session_state.force_step_4  # Clear the flag
-    
-    if 'force_step_5' in st.session_state and st.session_state.force_step_5:
-        if "5️⃣ Step 5: Setup Automation" in available_pages:
-            default_page = "5️⃣ Step 5: Setup Automation"
-            del st.session_state.force_step_5  # Clear the flag
+        available_pages = ALL_PAGES
+    
+    # A ?page= deep link is read on a session's first run and kept until that page unlocks
+    # (keys and brands live in session_state, so a new session always starts on Step 1)
+    if 'deep_link_checked' not in state:
+        state.deep_link_checked = True
+        linked_page = PAGES_BY_SLUG.get(st.query_params.get("page"))
+        # Only pages a later stage unlocks can wait - a "Show All Pages" page might never appear
+        if linked_page in STAGE_PAGES:
+            state._linked_page = linked_page
+    
+    # Keep the picker's default while the page list is unchanged - a new index would recreate the
+    # widget, snapping back from a forced or linked page and dropping the user's next pick
+    if state.get('_page_options') == available_pages and state.get('_page_default') in available_pages:
+        default_page = state._page_default
+    state._page_options = available_pages
+    
+    # Handle forced navigation (set by go_to_step) - consumed on the next run
+    forced_page = state.pop('_force_page', None)
+    if forced_page in available_pages:
+        default_page = forced_page
+    elif state.get('_linked_page') in available_pages:
+        default_page = state.pop('_linked_page')
     
     # Handle stay_on_step_5 flag to prevent unwanted navigation when entering Pipedream token
-    if 'stay_on_step_5' in st.session_state and st.session_state.stay_on_step_5:
+    if state.get('stay_on_step_5'):
         if "5️⃣ Step 5: Setup Automation" in available_pages:
             default_page = "5️⃣ Step 5: Setup Automation"
     
+    state._page_default = default_page
     page = st.sidebar.selectbox("Choose a page", available_pages, 
                                index=available_pages.index(default_page) if default_page in available_pages else 0)
     
+    # Picking a page by hand replaces a link that is still waiting to unlock
+    if page != default_page:
+        state.pop('_linked_page', None)
+    
+    # Keep the URL pointing at the current page so it can be shared or bookmarked
+    # (left alone while a linked page is still waiting to unlock)
+    if '_linked_page' not in state and st.query_params.get("page") != PAGE_SLUGS[page]:
+        st.query_params["page"] = PAGE_SLUGS[page]
+    
+    state.current_page = page
+    
+    # An analysis outcome is only shown on the page that started the run - drop it anywhere else
+    outcome = state.get('analysis_outcome')
+    if outcome is not None and outcome.page != page:
+        del state.analysis_outcome
+    
+    # Step 3 polls a running analysis itself - other pages get the small sidebar poller instead
+    if 'analysis_job' in state and page != "3️⃣ Step 3: Run Analysis":
+        with st.sidebar:
+            watch_analysis()
+    
     # Clear stay_on_step_5 flag if user navigates away from Step 5
-    if 'stay_on_step_5' in st.session_state and page != "5️⃣ Step 5: Setup Automation":
-        del st.session_state.stay_on_step_5
+    if 'stay_on_step_5' in state and page != "5️⃣ Step 5: Setup Automation":
+        del state.stay_on_step_5
     
     if page == "1️⃣ Step 1: Enter API Keys":
         show_step1_api_keys()
@@ -505,7 +805,7 @@ def main():
         show_brand_management(config)
     elif page == "📈 Visual Insights":
         # Get insights from session state if available
-        insights = st.session_state.get('analysis_insights', {})
+        insights = state.get('analysis_insights', {})
         show_insights_dashboard(insights)
     elif page == "📄 View Reports":
         show_reports()
@@ -538,9 +838,8 @@ def show_step1_api_keys():
         st.markdown("#### 🔍 Apify API Key")
         apify_key = st.text_input(
             "Enter your Apify API token",
-            value=st.session_state.get('temp_apify_key', ''),
             type="password",
-            placeholder="apify_api_...",
+            placeholder=key_placeholder('temp_apify_key', "apify_api_..."),
             key="step1_apify"
         )
         st.markdown("**[Get your free Apify key →](https://console.apify.com/account/integrations)**")
@@ -554,9 +853,8 @@ def show_step1_api_keys():
         st.markdown("#### 🧠 Claude API Key")
         claude_key = st.text_input(
             "Enter your Claude API key",
-            value=st.session_state.get('temp_claude_key', ''),
             type="password", 
-            placeholder="sk-ant-...",
+            placeholder=key_placeholder('temp_claude_key', "sk-ant-..."),
             key="step1_claude"
         )
         st.markdown("**[Get your Claude key →](https://console.anthropic.com)**")
@@ -570,34 +868,30 @@ def show_step1_api_keys():
     st.markdown("---")
     st.markdown("### ✅ Setup Status")
     
-    has_apify = 'temp_apify_key' in st.session_state and st.session_state.temp_apify_key
-    has_claude = 'temp_claude_key' in st.session_state and st.session_state.temp_claude_key
+    status = session_status()
     
     col1, col2, col3 = st.columns(3)
     with col1:
-        if has_apify:
+        if status.apify:
             st.success("✅ Apify Ready")
         else:
             st.error("❌ Apify Needed")
     
     with col2:
-        if has_claude:
+        if status.claude:
             st.success("✅ Claude Ready")
         else:
             st.error("❌ Claude Needed")
     
     with col3:
-        if has_apify and has_claude:
+        if status.apify and status.claude:
             st.success("🎉 Ready for Step 2!")
-            if st.button("➡️ Continue to Step 2: Select Brands", type="primary", use_container_width=True):
-                # Set navigation state to force Step 2
-                st.session_state.force_step_2 = True
-                st.rerun()
+            st.button("➡️ Continue to Step 2: Select Brands", type="primary", use_container_width=True, on_click=go_to_step, args=(2,))
         else:
             st.warning("⏳ Complete setup above")
     
     # Help section
-    if not (has_apify and has_claude):
+    if not (status.apify and status.claude):
         st.markdown("---")
         with st.expander("🆘 Need help getting API keys?"):
             st.markdown("""
@@ -635,23 +929,26 @@ def show_step2_brand_selection(config):
     
     # Pre-configured brands
     st.markdown("### 📋 Pre-configured Example Brands")
-    st.markdown("*These brands are ready to analyze - just check the boxes!*")
+    st.markdown("*These brands are ready to analyze - just pick them below!*")
     
     available_brands = config.get("brands", {})
     
     if available_brands:
-        for brand_name, brand_config in available_brands.items():
-            if brand_config.get("active", True):
-                is_selected = st.checkbox(
-                    f"**{brand_name}** - {brand_config.get('domain', 'No domain')}",
-                    value=brand_name in st.session_state.selected_brands,
-                    key=f"brand_select_{brand_name}"
-                )
-                
-                if is_selected and brand_name not in st.session_state.selected_brands:
-                    st.session_state.selected_brands.append(brand_name)
-                elif not is_selected and brand_name in st.session_state.selected_brands:
-                    st.session_state.selected_brands.remove(brand_name)
+        example_brands = get_active_brands(available_brands)
+        example_set = set(example_brands)  # O(1) membership for the splits below
+        selected = st.session_state.selected_brands
+        # Keyed widget: a default derived from selected_brands would change the
+        # widget identity on every pick and drop the next selection
+        if "example_brand_picker" not in st.session_state:
+            st.session_state.example_brand_picker = [brand for brand in selected if brand in example_set]
+        picked = st.multiselect(
+            "Select brands",
+            options=example_brands,
+            format_func=lambda name: f"{name} - {available_brands[name].get('domain', 'No domain')}",
+            key="example_brand_picker"
+        )
+        # Custom brands aren't options here - keep them selected
+        st.session_state.selected_brands = picked + [brand for brand in selected if brand not in example_set]
     else:
         st.info("No pre-configured brands available.")
     
@@ -660,46 +957,47 @@ def show_step2_brand_selection(config):
     st.markdown("### ➕ Add Your Own Brand")
     
     with st.expander("Add Custom Brand"):
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            custom_brand_name = st.text_input("Brand Name", placeholder="e.g., Your Competitor")
-            custom_facebook_id = st.text_input("Facebook Page ID", placeholder="e.g., 123456789")
-        
-        with col2:
-            custom_domain = st.text_input("Website Domain", placeholder="e.g., competitor.com")
+        # A form so typing in the fields doesn't rerun the whole page
+        with st.form("custom_brand_form"):
+            col1, col2 = st.columns(2)
             
-        if st.button("➕ Add This Brand"):
-            if custom_brand_name and (custom_facebook_id or custom_domain):
-                # Store in session state
-                if 'quick_brands' not in st.session_state:
-                    st.session_state.quick_brands = {}
-                
-                st.session_state.quick_brands[custom_brand_name] = {
-                    "facebook_id": custom_facebook_id,
-                    "domain": custom_domain,
-                    "active": True
-                }
-                
-                # Add to selected brands
-                if custom_brand_name not in st.session_state.selected_brands:
-                    st.session_state.selected_brands.append(custom_brand_name)
+            with col1:
+                custom_brand_name = st.text_input("Brand Name", placeholder="e.g., Your Competitor")
+                custom_facebook_id = st.text_input("Facebook Page ID", placeholder="e.g., 123456789")
+            
+            with col2:
+                custom_domain = st.text_input("Website Domain", placeholder="e.g., competitor.com")
                 
-                st.success(f"✅ Added {custom_brand_name}!")
-                st.rerun()
-            else:
-                st.error("Please provide at least brand name and Facebook ID or domain")
+            if st.form_submit_button("➕ Add This Brand"):
+                if custom_brand_name and (custom_facebook_id or custom_domain):
+                    # Store in session state
+                    st.session_state.setdefault('quick_brands', {})[custom_brand_name] = {
+                        "facebook_id": custom_facebook_id,
+                        "domain": custom_domain,
+                        "active": True
+                    }
+                    
+                    # Add to selected brands
+                    selected_brands = st.session_state.selected_brands
+                    if custom_brand_name not in selected_brands:
+                        selected_brands.append(custom_brand_name)
+                    
+                    st.success(f"✅ Added {custom_brand_name}!")
+                    st.rerun()
+                else:
+                    st.error("Please provide at least brand name and Facebook ID or domain")
     
     # Show custom brands if any
-    if 'quick_brands' in st.session_state and st.session_state.quick_brands:
+    quick_brands = st.session_state.get('quick_brands')
+    if quick_brands:
         st.markdown("#### Your Custom Brands:")
-        for brand_name, brand_config in st.session_state.quick_brands.items():
+        for brand_name, brand_config in quick_brands.items():
             col1, col2 = st.columns([3, 1])
             with col1:
                 st.write(f"🏢 **{brand_name}** - {brand_config.get('domain', 'No domain')}")
             with col2:
                 if st.button("🗑️", key=f"delete_{brand_name}", help="Remove brand"):
-                    del st.session_state.quick_brands[brand_name]
+                    del quick_brands[brand_name]
                     if brand_name in st.session_state.selected_brands:
                         st.session_state.selected_brands.remove(brand_name)
                     st.rerun()
@@ -717,21 +1015,12 @@ def show_step2_brand_selection(config):
         
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("⬅️ Back to Step 1", use_container_width=True):
-                # Set navigation state to force Step 1
-                st.session_state.force_step_1 = True
-                st.rerun()
+            st.button("⬅️ Back to Step 1", use_container_width=True, on_click=go_to_step, args=(1,))
         with col2:
-            if st.button("➡️ Continue to Step 3: Run Analysis", type="primary", use_container_width=True):
-                # Set navigation state to force Step 3
-                st.session_state.force_step_3 = True
-                st.rerun()
+            st.button("➡️ Continue to Step 3: Run Analysis", type="primary", use_container_width=True, on_click=go_to_step, args=(3,))
     else:
         st.warning("⚠️ Please select at least one brand to analyze")
-        if st.button("⬅️ Back to Step 1", use_container_width=True):
-            # Set navigation state to force Step 1
-            st.session_state.force_step_1 = True
-            st.rerun()
+        st.button("⬅️ Back to Step 1", use_container_width=True, on_click=go_to_step, args=(1,))
 
 def show_step3_run_analysis(config):
     """Step 3: Run Analysis"""
@@ -745,23 +1034,12 @@ def show_step3_run_analysis(config):
     # Get session-enhanced config
     session_config = get_session_config(config)
     
-    # Add selected brands to config
+    # Narrow the session brands (configured + custom) down to the selection
     if 'selected_brands' in st.session_state:
-        # Filter brands based on selection
-        selected_brand_configs = {}
-        
-        # Add selected pre-configured brands
-        for brand_name in st.session_state.selected_brands:
-            if brand_name in config.get("brands", {}):
-                selected_brand_configs[brand_name] = config["brands"][brand_name]
-        
-        # Add selected custom brands
-        if 'quick_brands' in st.session_state:
-            for brand_name in st.session_state.selected_brands:
-                if brand_name in st.session_state.quick_brands:
-                    selected_brand_configs[brand_name] = st.session_state.quick_brands[brand_name]
-        
-        session_config['brands'] = selected_brand_configs
+        available_brands = session_config.get('brands', {})
+        session_config['brands'] = {brand_name: available_brands[brand_name]
+                                    for brand_name in st.session_state.selected_brands
+                                    if brand_name in available_brands}
     
     # Analysis summary
     st.markdown("### 🎯 Analysis Summary")
@@ -784,10 +1062,7 @@ def show_step3_run_analysis(config):
             st.write(f"• {brand}")
     else:
         st.error("❌ No brands selected. Go back to Step 2.")
-        if st.button("⬅️ Back to Step 2"):
-            # Set navigation state to force Step 2
-            st.session_state.force_step_2 = True
-            st.rerun()
+        st.button("⬅️ Back to Step 2", on_click=go_to_step, args=(2,))
         return
     
     # Analysis options
@@ -815,107 +1090,82 @@ def show_step3_run_analysis(config):
             help="Send results via webhook (if configured)"
         )
     
+    # Outcome of a background analysis that just finished (stored by main)
+    outcome = st.session_state.pop('analysis_outcome', None)
+    
     # Run analysis button
     st.markdown("---")
     
     col1, col2 = st.columns([1, 2])
     with col1:
-        if st.button("⬅️ Back to Step 2", use_container_width=True):
-            # Set navigation state to force Step 2
-            st.session_state.force_step_2 = True
-            st.rerun()
+        st.button("⬅️ Back to Step 2", use_container_width=True, on_click=go_to_step, args=(2,))
     
     with col2:
-        if st.button("🚀 Run Competitive Analysis", type="primary", use_container_width=True):
-            if "analysis_running" not in st.session_state:
-                st.session_state.analysis_running = False
+        # The button is swapped out while a run is going so a double click can't start another
+        run_slot = st.empty()
+        if 'analysis_job' not in st.session_state and run_slot.button(
+                "🚀 Run Competitive Analysis", type="primary", use_container_width=True):
+            # Override notification setting
+            session_config["notifications"]["enabled"] = include_notifications
             
-            if not st.session_state.analysis_running:
-                st.session_state.analysis_running = True
-                
-                with st.spinner("🔄 Running competitive intelligence analysis..."):
-                    try:
-                        # Initialize tool with session config
-                        intel = CompetitiveIntel()
-                        intel.config = session_config
-                        
-                        # Override notification setting
-                        intel.config["notifications"]["enabled"] = include_notifications
-                        
-                        # Run analysis
-                        brand_to_analyze = single_brand if analyze_all == "Single brand only" else None
-                        
-                        st.info("🔄 Starting analysis... This may take 1-2 minutes per brand.")
-                        report, insights = intel.run_analysis(brand_to_analyze)
-                        
-                        if report and insights:
-                            st.success("✅ Analysis completed successfully!")
-                            
-                            # Store insights and report for visual dashboard
-                            st.session_state.analysis_insights = insights
-                            st.session_state.last_analysis_report = report
-                            
-                            # Show key metrics
-                            total_ads = sum(brand_insights.get('performance_indicators', {}).get('total_ads', 0) 
-                                          for brand_insights in insights.values())
-                            
-                            col1, col2, col3 = st.columns(3)
-                            with col1:
-                                st.metric("Total Ads Found", total_ads)
-                            with col2:
-                                st.metric("Brands Analyzed", len(insights))
-                            with col3:
-                                active_ads = sum(brand_insights.get('performance_indicators', {}).get('active_ads', 0) 
-                                               for brand_insights in insights.values())
-                                st.metric("Active Ads", active_ads)
-                            
-                            # Action buttons
-                            st.markdown("### 🎉 Analysis Complete! What's next?")
-                            
-                            # Primary next step
-                            if st.button("➡️ Continue to Step 4: View Results", type="primary", use_container_width=True):
-                                # Set navigation state to force Step 4
-                                st.session_state.force_step_4 = True
-                                st.rerun()
-                            
-                            st.markdown("**Or explore your results:**")
-                            col1, col2, col3 = st.columns(3)
-                            with col1:
-                                st.download_button(
-                                    "📥 Download Report",
-                                    data=report,
-                                    file_name=f"competitive_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
-                                    mime="text/markdown",
-                                    use_container_width=True
-                                )
-                            
-                            with col2:
-                                if st.button("📊 View Visual Insights", use_container_width=True):
-                                    st.session_state.goto_insights = True
-                                    st.rerun()
-                            
-                            with col3:
-                                if st.button("🔄 Analyze Different Brands", use_container_width=True):
-                                    # Reset selections for new analysis
-                                    st.session_state.selected_brands = []
-                                    if 'quick_brands' in st.session_state:
-                                        del st.session_state.quick_brands
-                                    st.rerun()
-                            
-                            # No report preview - full results shown in Step 4
-                            
-                        else:
-                            st.error("❌ Analysis failed. Please check your API keys and try again.")
-                    
-                    except Exception as e:
-                        st.error(f"❌ Analysis error: {str(e)}")
-                        st.markdown("**Common issues:**")
-                        st.markdown("- Invalid API keys")
-                        st.markdown("- Insufficient API credits")
-                        st.markdown("- Network connectivity issues")
-                    
-                    finally:
-                        st.session_state.analysis_running = False
+            # Run analysis in the background so reruns and page changes don't cancel it
+            brand_to_analyze = single_brand if analyze_all == "Single brand only" else None
+            start_analysis(brand_to_analyze, session_config)
+            run_slot.empty()
+    
+    if 'analysis_job' in st.session_state:
+        show_analysis_progress()
+    
+    if outcome is not None:
+        if outcome.error is not None:
+            st.error(ANALYSIS_ERROR_HELP.format(error=outcome.error))
+        elif outcome.no_brands:
+            st.error("❌ No active brands to analyze. Check your selection in Step 2.")
+        elif outcome.report and outcome.insights:
+            report, insights = outcome.report, outcome.insights
+            st.success("✅ Analysis completed successfully!")
+            
+            # Show key metrics
+            performance = aggregate_insights(insights)['performance_indicators']
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total Ads Found", performance.get('total_ads', 0))
+            with col2:
+                st.metric("Brands Analyzed", len(insights))
+            with col3:
+                st.metric("Active Ads", performance.get('active_ads', 0))
+            
+            # Action buttons
+            st.markdown("### 🎉 Analysis Complete! What's next?")
+            
+            # Primary next step
+            st.button("➡️ Continue to Step 4: View Results", type="primary", use_container_width=True, on_click=go_to_step, args=(4,))
+            
+            st.markdown("**Or explore your results:**")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.download_button(
+                    "📥 Download Report",
+                    data=report.encode("utf-8"),
+                    file_name=f"competitive_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
+                    mime="text/markdown",
+                    use_container_width=True
+                )
+            
+            with col2:
+                st.button("📊 View Visual Insights", use_container_width=True,
+                          on_click=go_to_page, args=("📈 Visual Insights",))
+            
+            with col3:
+                # Reset selections for new analysis
+                st.button("🔄 Analyze Different Brands", use_container_width=True,
+                          on_click=reset_analysis, kwargs={"clear_results": False, "clear_custom_brands": True})
+            
+            # No report preview - full results shown in Step 4
+        
+        else:
+            st.error("❌ Analysis failed. Please check your API keys and try again.")
 
 def show_step4_view_results(config):
     """Step 4: View Analysis Results"""
@@ -927,14 +1177,14 @@ def show_step4_view_results(config):
     """, unsafe_allow_html=True)
     
     # Check if we have analysis results
-    if 'analysis_insights' not in st.session_state or not st.session_state.analysis_insights:
+    insights = st.session_state.get('analysis_insights')
+    if not insights:
         st.error("❌ No analysis results found. Please run analysis in Step 3 first.")
-        if st.button("⬅️ Back to Step 3: Run Analysis"):
-            st.session_state.force_step_3 = True
-            st.rerun()
+        st.button("⬅️ Back to Step 3: Run Analysis", on_click=go_to_step, args=(3,))
         return
     
-    insights = st.session_state.analysis_insights
+    # Encoded only when a download button is clicked, so reruns don't resend the report
+    report_bytes = partial(st.session_state.get('last_analysis_report', '').encode, "utf-8")
     
     st.markdown("""
     ### 🎉 Your Competitive Analysis is Complete!
@@ -943,11 +1193,10 @@ def show_step4_view_results(config):
     """)
     
     # Analysis overview metrics
-    total_ads = sum(brand_insights.get('performance_indicators', {}).get('total_ads', 0) 
-                   for brand_insights in insights.values())
+    performance = aggregate_insights(insights)['performance_indicators']
+    total_ads = performance.get('total_ads', 0)
     total_brands = len(insights)
-    active_ads = sum(brand_insights.get('performance_indicators', {}).get('active_ads', 0) 
-                    for brand_insights in insights.values())
+    active_ads = performance.get('active_ads', 0)
     
     # Top-level metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -1040,17 +1289,16 @@ def show_step4_view_results(config):
                 # Markdown report
                 st.download_button(
                     "📄 Download Markdown Report",
-                    data=st.session_state.last_analysis_report,
+                    data=report_bytes,
                     file_name=f"competitive_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
                     mime="text/markdown",
                     use_container_width=True
                 )
                 
-                # JSON data export
-                insights_json = json.dumps(insights, indent=2, default=str)
+                # JSON data export (serialized on click)
                 st.download_button(
                     "📊 Download Raw Data (JSON)",
-                    data=insights_json,
+                    data=lambda: json.dumps(insights, indent=2, default=str).encode("utf-8"),
                     file_name=f"competitive_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
                     mime="application/json",
                     use_container_width=True
@@ -1059,15 +1307,8 @@ def show_step4_view_results(config):
         with col2:
             st.markdown("#### 🔄 Next Steps")
             
-            if st.button("⬅️ Run New Analysis", use_container_width=True):
-                # Clear current analysis and go back to Step 2
-                if 'analysis_insights' in st.session_state:
-                    del st.session_state.analysis_insights
-                if 'last_analysis_report' in st.session_state:
-                    del st.session_state.last_analysis_report
-                st.session_state.selected_brands = []
-                st.session_state.force_step_2 = True
-                st.rerun()
+            # Clear current analysis and go back to Step 2
+            st.button("⬅️ Run New Analysis", use_container_width=True, on_click=reset_analysis)
             
             if st.button("📧 Share via Email", use_container_width=True):
                 # Generate email content
@@ -1090,28 +1331,38 @@ def show_step4_view_results(config):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.button("⬅️ Back to Step 3", use_container_width=True):
-            st.session_state.force_step_3 = True
-            st.rerun()
+        st.button("⬅️ Back to Step 3", use_container_width=True, on_click=go_to_step, args=(3,))
     
     with col2:
-        if st.button("➡️ Continue to Step 5: Setup Automation", type="primary", use_container_width=True):
-            st.session_state.force_step_5 = True
-            st.rerun()
+        st.button("➡️ Continue to Step 5: Setup Automation", type="primary", use_container_width=True, on_click=go_to_step, args=(5,))
     
     with col3:
         # Download report button
         if 'last_analysis_report' in st.session_state:
             st.download_button(
                 "📥 Download Report",
-                data=st.session_state.last_analysis_report,
+                data=report_bytes,
                 file_name=f"competitive_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
                 mime="text/markdown",
                 use_container_width=True
             )
 
+# Notification services: (session key set once the service is configured, status line)
+SERVICE_SETUP = {
+    "slack": ("slack_channel", lambda state: f"✅ Slack configured for {state.slack_channel}"),
+    "discord": ("discord_token", lambda state: f"✅ Discord configured for #{state.discord_channel}"),
+    "teams": ("teams_channel", lambda state: f"✅ Teams configured for {state.teams_channel}"),
+    "email": ("email_recipients", lambda state: f"✅ Email configured for {len(state.email_recipients)} recipients"),
+    "webhook": ("webhook_url", lambda state: f"✅ Webhook configured: {state.webhook_url[:50]}..."),
+}
+
+def service_configured(service: str) -> bool:
+    """Check whether the selected notification service has its settings saved"""
+    return service in SERVICE_SETUP and SERVICE_SETUP[service][0] in st.session_state
+
 def show_step5_automation_setup(config):
     """Step 5: Automation & Webhook Setup"""
+    state = st.session_state
     st.markdown("""
     <div class="step-header">
         <h1 style="margin: 0;">5️⃣ Step 5: Setup Automation</h1>
@@ -1129,10 +1380,9 @@ def show_step5_automation_setup(config):
     """)
     
     # Show what they analyzed
-    if 'analysis_insights' in st.session_state and st.session_state.analysis_insights:
-        insights = st.session_state.analysis_insights
-        total_ads = sum(brand_insights.get('performance_indicators', {}).get('total_ads', 0) 
-                       for brand_insights in insights.values())
+    if 'analysis_insights' in state and state.analysis_insights:
+        insights = state.analysis_insights
+        total_ads = aggregate_insights(insights)['performance_indicators']['total_ads']
         brands_analyzed = len(insights)
         
         st.success(f"✅ **Your last analysis**: {brands_analyzed} brands, {total_ads} ads analyzed")
@@ -1147,8 +1397,8 @@ def show_step5_automation_setup(config):
         We'll automatically create and deploy a Pipedream workflow for you!
         """)
         
-        # Initialize Pipedream integration
-        pd_integration = PipedreamIntegration()
+        # Shared tokenless client - only used for the service list and OAuth links
+        pd_integration = get_pipedream()
         
         # Pipedream API token input
         st.markdown("#### 🔑 Pipedream Setup")
@@ -1157,7 +1407,7 @@ def show_step5_automation_setup(config):
         with col1:
             pipedream_token = st.text_input(
                 "Pipedream API Token",
-                value=st.session_state.get('pipedream_token', ''),
+                value=state.get('pipedream_token', ''),
                 type="password",
                 placeholder="pd_***",
                 help="Get your token from pipedream.com/settings/account"
@@ -1167,15 +1417,14 @@ def show_step5_automation_setup(config):
             st.markdown("[Get Token →](https://pipedream.com/settings/account)")
         
         if pipedream_token:
-            st.session_state.pipedream_token = pipedream_token
-            pd_integration.api_token = pipedream_token
+            state.pipedream_token = pipedream_token
             st.success("✅ Pipedream API token set")
             # Prevent navigation back to Step 4 when token is entered
-            st.session_state.stay_on_step_5 = True
+            state.stay_on_step_5 = True
         else:
             # Clear the stay flag if token is removed
-            if 'stay_on_step_5' in st.session_state:
-                del st.session_state.stay_on_step_5
+            if 'stay_on_step_5' in state:
+                del state.stay_on_step_5
         
         # Service selection
         st.markdown("---")
@@ -1183,26 +1432,28 @@ def show_step5_automation_setup(config):
         
         services = pd_integration.get_available_services()
         
-        # Display services in a grid
-        cols = st.columns(3)
-        selected_service = None
-        
-        for i, service in enumerate(services[:6]):  # Show first 6 services
-            with cols[i % 3]:
-                if st.button(
-                    f"{service['icon']} {service['name']}", 
-                    help=service['description'],
-                    use_container_width=True,
-                    key=f"service_{service['id']}"
-                ):
-                    selected_service = service['id']
-                    st.session_state.selected_service = service['id']
-                    st.session_state.selected_service_name = service['name']
+        # One radio instead of a grid of buttons (keyed and seeded so the pick survives reruns)
+        service_options = {service['id']: service for service in services[:6]}  # Show first 6 services
+        if "service_picker" not in state and 'selected_service' in state:
+            state.service_picker = state.selected_service
+        picked_service = st.radio(
+            "Notification service",
+            options=list(service_options),
+            format_func=lambda service_id: f"{service_options[service_id]['icon']} {service_options[service_id]['name']}",
+            captions=[service['description'] for service in service_options.values()],
+            index=None,
+            horizontal=True,
+            label_visibility="collapsed",
+            key="service_picker"
+        )
+        if picked_service:
+            state.selected_service = picked_service
+            state.selected_service_name = service_options[picked_service]['name']
         
         # Show selected service configuration
-        if 'selected_service' in st.session_state:
-            selected_service = st.session_state.selected_service
-            service_name = st.session_state.selected_service_name
+        if 'selected_service' in state:
+            selected_service = state.selected_service
+            service_name = state.selected_service_name
             
             st.markdown(f"---")
             st.markdown(f"### ⚙️ Configure {service_name}")
@@ -1210,17 +1461,18 @@ def show_step5_automation_setup(config):
             if selected_service == "slack":
                 st.markdown("#### 🔗 Slack OAuth Connection")
                 
-                col1, col2 = st.columns(2)
-                with col1:
-                    slack_channel = st.text_input("Slack Channel", value="#competitive-intel", placeholder="#channel-name")
-                    
-                with col2:
-                    if st.button("🔗 Connect to Slack", type="primary", use_container_width=True):
-                        # Generate OAuth URL
-                        oauth_url = pd_integration.create_oauth_url("slack", st.session_state.get('redirect_uri', ''))
-                        st.session_state.slack_channel = slack_channel
-                        st.markdown(f"**[🔗 Click here to connect Slack →]({oauth_url})**")
-                        st.info("After connecting, return here to complete setup.")
+                with st.form("slack_form"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        slack_channel = st.text_input("Slack Channel", value="#competitive-intel", placeholder="#channel-name")
+                        
+                    with col2:
+                        if st.form_submit_button("🔗 Connect to Slack", type="primary", use_container_width=True):
+                            # Generate OAuth URL
+                            oauth_url = pd_integration.create_oauth_url("slack", state.get('redirect_uri', ''))
+                            state.slack_channel = slack_channel
+                            st.markdown(f"**[🔗 Click here to connect Slack →]({oauth_url})**")
+                            st.info("After connecting, return here to complete setup.")
                 
                 # OAuth instructions
                 with st.expander("📖 Slack Setup Instructions"):
@@ -1229,19 +1481,20 @@ def show_step5_automation_setup(config):
             elif selected_service == "discord":
                 st.markdown("#### 🎮 Discord Bot Connection")
                 
-                col1, col2 = st.columns(2)
-                with col1:
-                    discord_channel = st.text_input("Discord Channel", value="competitive-intel", placeholder="channel-name")
-                    discord_token = st.text_input("Discord Bot Token", type="password", placeholder="Bot token")
-                    
-                with col2:
-                    if st.button("🔗 Connect to Discord", type="primary", use_container_width=True):
-                        if discord_token:
-                            st.session_state.discord_channel = discord_channel
-                            st.session_state.discord_token = discord_token
-                            st.success("✅ Discord configuration saved!")
-                        else:
-                            st.error("Please provide Discord bot token")
+                with st.form("discord_form"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        discord_channel = st.text_input("Discord Channel", value="competitive-intel", placeholder="channel-name")
+                        discord_token = st.text_input("Discord Bot Token", type="password", placeholder="Bot token")
+                        
+                    with col2:
+                        if st.form_submit_button("🔗 Connect to Discord", type="primary", use_container_width=True):
+                            if discord_token:
+                                state.discord_channel = discord_channel
+                                state.discord_token = discord_token
+                                st.success("✅ Discord configuration saved!")
+                            else:
+                                st.error("Please provide Discord bot token")
                 
                 with st.expander("📖 Discord Setup Instructions"):
                     st.markdown(get_oauth_instructions("discord"))
@@ -1249,16 +1502,17 @@ def show_step5_automation_setup(config):
             elif selected_service == "teams":
                 st.markdown("#### 🏢 Microsoft Teams Connection")
                 
-                col1, col2 = st.columns(2)
-                with col1:
-                    teams_channel = st.text_input("Teams Channel", value="Competitive Intelligence", placeholder="Channel name")
-                    
-                with col2:
-                    if st.button("🔗 Connect to Teams", type="primary", use_container_width=True):
-                        oauth_url = pd_integration.create_oauth_url("teams", st.session_state.get('redirect_uri', ''))
-                        st.session_state.teams_channel = teams_channel
-                        st.markdown(f"**[🔗 Click here to connect Teams →]({oauth_url})**")
-                        st.info("After connecting, return here to complete setup.")
+                with st.form("teams_form"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        teams_channel = st.text_input("Teams Channel", value="Competitive Intelligence", placeholder="Channel name")
+                        
+                    with col2:
+                        if st.form_submit_button("🔗 Connect to Teams", type="primary", use_container_width=True):
+                            oauth_url = pd_integration.create_oauth_url("teams", state.get('redirect_uri', ''))
+                            state.teams_channel = teams_channel
+                            st.markdown(f"**[🔗 Click here to connect Teams →]({oauth_url})**")
+                            st.info("After connecting, return here to complete setup.")
                 
                 with st.expander("📖 Teams Setup Instructions"):
                     st.markdown(get_oauth_instructions("teams"))
@@ -1266,87 +1520,83 @@ def show_step5_automation_setup(config):
             elif selected_service == "email":
                 st.markdown("#### 📧 Email Configuration")
                 
-                col1, col2 = st.columns(2)
-                with col1:
-                    email_recipients = st.text_area(
-                        "Email Recipients", 
-                        placeholder="user1@company.com, user2@company.com",
-                        help="Enter email addresses separated by commas"
-                    )
-                    
-                with col2:
-                    email_subject = st.text_input(
-                        "Email Subject", 
-                        value="Competitive Intelligence Report",
-                        placeholder="Subject line"
-                    )
-                    
-                if st.button("📧 Configure Email", type="primary", use_container_width=True):
-                    if email_recipients:
-                        emails = [email.strip() for email in email_recipients.split(",")]
-                        st.session_state.email_recipients = emails
-                        st.session_state.email_subject = email_subject
-                        st.success(f"✅ Email configured for {len(emails)} recipients")
-                    else:
-                        st.error("Please provide at least one email recipient")
+                with st.form("email_form"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        email_recipients = st.text_area(
+                            "Email Recipients", 
+                            placeholder="user1@company.com, user2@company.com",
+                            help="Enter email addresses separated by commas"
+                        )
+                        
+                    with col2:
+                        email_subject = st.text_input(
+                            "Email Subject", 
+                            value="Competitive Intelligence Report",
+                            placeholder="Subject line"
+                        )
+                        
+                    if st.form_submit_button("📧 Configure Email", type="primary", use_container_width=True):
+                        # Drop blanks, duplicates and entries that can't be addresses (keeps the order typed)
+                        emails = list(dict.fromkeys(email for email in (part.strip() for part in email_recipients.split(",")) if "@" in email))
+                        if emails:
+                            state.email_recipients = emails
+                            state.email_subject = email_subject
+                            st.success(f"✅ Email configured for {len(emails)} recipients")
+                        else:
+                            st.error("Please provide at least one email recipient")
                         
             elif selected_service == "webhook":
                 st.markdown("#### 🔗 Custom Webhook")
                 
-                webhook_url = st.text_input(
-                    "Webhook URL",
-                    placeholder="https://your-webhook-endpoint.com/receive",
-                    help="Any HTTP endpoint that can receive JSON POST requests"
-                )
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("🧪 Test Webhook", use_container_width=True):
-                        if webhook_url:
-                            with st.spinner("Testing webhook..."):
-                                try:
-                                    test_payload = {
-                                        "test": True,
-                                        "message": "Test from Competitive Intelligence Tool",
-                                        "timestamp": datetime.now().isoformat()
-                                    }
-                                    response = requests.post(webhook_url, json=test_payload, timeout=10)
-                                    if response.status_code == 200:
-                                        st.success("✅ Webhook test successful!")
-                                    else:
-                                        st.error(f"❌ Test failed: {response.status_code}")
-                                except Exception as e:
-                                    st.error(f"❌ Test error: {str(e)}")
-                        else:
-                            st.error("Please enter webhook URL")
-                            
-                with col2:
-                    if st.button("💾 Save Webhook", type="primary", use_container_width=True):
-                        if webhook_url:
-                            st.session_state.webhook_url = webhook_url
-                            st.success("✅ Webhook URL saved!")
-                        else:
-                            st.error("Please enter webhook URL")
+                with st.form("webhook_form"):
+                    webhook_url = st.text_input(
+                        "Webhook URL",
+                        placeholder="https://your-webhook-endpoint.com/receive",
+                        help="Any HTTP endpoint that can receive JSON POST requests"
+                    )
+                    
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if st.form_submit_button("🧪 Test Webhook", use_container_width=True):
+                            if webhook_url:
+                                with st.spinner("Testing webhook..."):
+                                    try:
+                                        test_payload = {
+                                            "test": True,
+                                            "message": "Test from Competitive Intelligence Tool",
+                                            "timestamp": datetime.now().isoformat()
+                                        }
+                                        # One-off request - a user-supplied URL must never go through a session shared with other users
+                                        response = requests.post(webhook_url, json=test_payload, timeout=10)
+                                        if response.status_code == 200:
+                                            st.success("✅ Webhook test successful!")
+                                        else:
+                                            st.error(f"❌ Test failed: {response.status_code}")
+                                    except Exception as e:
+                                        st.error(f"❌ Test error: {str(e)}")
+                            else:
+                                st.error("Please enter webhook URL")
+                                
+                    with col2:
+                        if st.form_submit_button("💾 Save Webhook", type="primary", use_container_width=True):
+                            if webhook_url:
+                                state.webhook_url = webhook_url
+                                st.success("✅ Webhook URL saved!")
+                            else:
+                                st.error("Please enter webhook URL")
         
         # Show connection status
-        if 'selected_service' in st.session_state:
+        if 'selected_service' in state:
             st.markdown("---")
             st.markdown("### ✅ Connection Status")
             
-            service = st.session_state.selected_service
+            service = state.selected_service
             
-            if service == "slack" and 'slack_channel' in st.session_state:
-                st.success(f"✅ Slack configured for {st.session_state.slack_channel}")
-            elif service == "discord" and 'discord_token' in st.session_state:
-                st.success(f"✅ Discord configured for #{st.session_state.discord_channel}")
-            elif service == "teams" and 'teams_channel' in st.session_state:
-                st.success(f"✅ Teams configured for {st.session_state.teams_channel}")
-            elif service == "email" and 'email_recipients' in st.session_state:
-                st.success(f"✅ Email configured for {len(st.session_state.email_recipients)} recipients")
-            elif service == "webhook" and 'webhook_url' in st.session_state:
-                st.success(f"✅ Webhook configured: {st.session_state.webhook_url[:50]}...")
+            if service_configured(service):
+                st.success(SERVICE_SETUP[service][1](state))
             else:
-                st.warning(f"⚠️ {st.session_state.selected_service_name} connection incomplete")
+                st.warning(f"⚠️ {state.selected_service_name} connection incomplete")
     
     with tab2:
         st.markdown("### ⏰ Automation Schedule")
@@ -1395,12 +1645,12 @@ def show_step5_automation_setup(config):
                 "interval_days": interval_days,
                 "lookback_days": lookback_days,
                 "max_ads": max_ads,
-                "webhook_url": st.session_state.get('automation_webhook', ''),
-                "brands": st.session_state.get('selected_brands', []),
+                "webhook_url": state.get('automation_webhook', ''),
+                "brands": state.get('selected_brands', []),
                 "api_keys_note": "User must provide their own API keys"
             }
             
-            st.session_state.automation_config = automation_config
+            state.automation_config = automation_config
             
             st.info("""
             💡 **Note**: This tool runs in your browser session. For true automation, you'll need to:
@@ -1413,8 +1663,8 @@ def show_step5_automation_setup(config):
         st.markdown("### 📋 Automation Summary")
         
         # Show current configuration
-        if 'automation_config' in st.session_state:
-            config = st.session_state.automation_config
+        if 'automation_config' in state:
+            config = state.automation_config
             
             st.success("✅ **Automation Configuration Saved**")
             
@@ -1443,22 +1693,13 @@ def show_step5_automation_setup(config):
         st.markdown("---")
         st.markdown("### 🚀 Create Pipedream Workflow")
         
-        if 'automation_config' in st.session_state and 'selected_service' in st.session_state:
-            config = st.session_state.automation_config
+        if 'automation_config' in state and 'selected_service' in state:
+            config = state.automation_config
             
             # Check if all requirements are met
-            has_pipedream_token = 'pipedream_token' in st.session_state and st.session_state.pipedream_token
-            has_service_config = False
-            
-            service = st.session_state.selected_service
-            if service == "slack" and 'slack_channel' in st.session_state:
-                has_service_config = True
-            elif service == "discord" and 'discord_token' in st.session_state:
-                has_service_config = True
-            elif service == "email" and 'email_recipients' in st.session_state:
-                has_service_config = True
-            elif service == "webhook" and 'webhook_url' in st.session_state:
-                has_service_config = True
+            has_pipedream_token = 'pipedream_token' in state and state.pipedream_token
+            service = state.selected_service
+            has_service_config = service_configured(service)
             
             if has_pipedream_token and has_service_config:
                 col1, col2 = st.columns(2)
@@ -1468,7 +1709,7 @@ def show_step5_automation_setup(config):
                         with st.spinner("Creating Pipedream workflow..."):
                             try:
                                 # Initialize Pipedream integration
-                                pd_integration = PipedreamIntegration(st.session_state.pipedream_token)
+                                pd_integration = PipedreamIntegration(state.pipedream_token)
                                 
                                 # Prepare workflow configuration
                                 workflow_config = {
@@ -1477,22 +1718,22 @@ def show_step5_automation_setup(config):
                                     "brands": config.get('brands', []),
                                     "lookback_days": config.get('lookback_days', 7),
                                     "max_ads": config.get('max_ads', 10),
-                                    "apify_key": st.session_state.get('temp_apify_key', ''),
-                                    "claude_key": st.session_state.get('temp_claude_key', ''),
-                                    "analysis_endpoint": f"{st.session_state.get('app_url', 'https://your-app.streamlit.app')}/api/analyze"
+                                    "apify_key": state.get('temp_apify_key', ''),
+                                    "claude_key": state.get('temp_claude_key', ''),
+                                    "analysis_endpoint": f"{state.get('app_url', 'https://your-app.streamlit.app')}/api/analyze"
                                 }
                                 
                                 # Add service-specific config
                                 if service == "slack":
-                                    workflow_config["slack_channel"] = st.session_state.get('slack_channel', '#competitive-intel')
+                                    workflow_config["slack_channel"] = state.get('slack_channel', '#competitive-intel')
                                 elif service == "discord":
-                                    workflow_config["discord_channel"] = st.session_state.get('discord_channel', 'competitive-intel')
-                                    workflow_config["discord_token"] = st.session_state.get('discord_token', '')
+                                    workflow_config["discord_channel"] = state.get('discord_channel', 'competitive-intel')
+                                    workflow_config["discord_token"] = state.get('discord_token', '')
                                 elif service == "email":
-                                    workflow_config["email_recipients"] = st.session_state.get('email_recipients', [])
-                                    workflow_config["email_subject"] = st.session_state.get('email_subject', 'Competitive Intelligence Report')
+                                    workflow_config["email_recipients"] = state.get('email_recipients', [])
+                                    workflow_config["email_subject"] = state.get('email_subject', 'Competitive Intelligence Report')
                                 elif service == "webhook":
-                                    workflow_config["webhook_url"] = st.session_state.get('webhook_url', '')
+                                    workflow_config["webhook_url"] = state.get('webhook_url', '')
                                 
                                 # Create workflow template
                                 template = pd_integration.create_workflow_template(workflow_config)
@@ -1502,8 +1743,8 @@ def show_step5_automation_setup(config):
                                 
                                 if success:
                                     st.success("✅ Workflow created successfully!")
-                                    st.session_state.workflow_id = workflow_data.get('id', '')
-                                    st.session_state.workflow_url = workflow_data.get('url', '')
+                                    state.workflow_id = workflow_data.get('id', '')
+                                    state.workflow_url = workflow_data.get('url', '')
                                     
                                     # Show workflow details
                                     st.markdown("**Workflow Details:**")
@@ -1544,10 +1785,10 @@ def show_step5_automation_setup(config):
                                         **Copy these values to Pipedream:**
                                         
                                         **APIFY_API_TOKEN**:  
-                                        `{st.session_state.get('temp_apify_key', 'Not found')[:20]}...`
+                                        `{state.get('temp_apify_key', 'Not found')[:20]}...`
                                         
                                         **CLAUDE_API_KEY**:  
-                                        `{st.session_state.get('temp_claude_key', 'Not found')[:20]}...`
+                                        `{state.get('temp_claude_key', 'Not found')[:20]}...`
                                         
                                         *Note: Copy the full keys from Step 1 if you need them again*
                                         """)
@@ -1558,19 +1799,20 @@ def show_step5_automation_setup(config):
                                 st.error(f"❌ Error creating workflow: {str(e)}")
                 
                 with col2:
-                    # Download configuration
-                    config_json = json.dumps({
-                        **st.session_state.automation_config,
+                    # Download configuration - encoded only when clicked (the callable runs off the
+                    # script thread, so the session values are collected here)
+                    download_config = {
+                        **state.automation_config,
                         "service_config": {
                             "service": service,
                             "pipedream_token": "***HIDDEN***",
-                            **{k: v for k, v in st.session_state.items() if k.startswith(f"{service}_")}
+                            **{k: v for k, v in state.items() if k.startswith(f"{service}_")}
                         }
-                    }, indent=2, default=str)
+                    }
                     
                     st.download_button(
                         "📥 Download Config",
-                        data=config_json,
+                        data=lambda: json.dumps(download_config, indent=2, default=str).encode("utf-8"),
                         file_name=f"competitive_intel_automation_{datetime.now().strftime('%Y%m%d')}.json",
                         mime="application/json",
                         use_container_width=True
@@ -1579,17 +1821,17 @@ def show_step5_automation_setup(config):
                 st.warning("⚠️ Complete Pipedream token and service configuration to create workflow")
         
         # Manual workflow option
-        if 'automation_config' in st.session_state:
+        if 'automation_config' in state:
             st.markdown("---")
             st.markdown("### 📝 Manual Workflow Setup")
             st.markdown("Prefer to set up the workflow manually? Download the template:")
             
             if st.button("📋 Generate Workflow Template"):
-                pd_integration = PipedreamIntegration()
-                config = st.session_state.automation_config
+                pd_integration = get_pipedream()
+                config = state.automation_config
                 
                 workflow_config = {
-                    "service": st.session_state.get('selected_service', 'slack'),
+                    "service": state.get('selected_service', 'slack'),
                     "schedule": config.get('schedule_type', 'daily'),
                     "brands": config.get('brands', []),
                     "lookback_days": config.get('lookback_days', 7),
@@ -1616,7 +1858,7 @@ def show_step5_automation_setup(config):
         st.markdown("---")
         st.markdown("### 🎉 You're All Set!")
         
-        if 'workflow_url' in st.session_state and st.session_state.workflow_url:
+        if 'workflow_url' in state and state.workflow_url:
             st.success("""
             ✅ **Automation Configured Successfully!**
             
@@ -1625,7 +1867,7 @@ def show_step5_automation_setup(config):
             2. Deploy the workflow to start receiving automated reports
             """)
             
-            st.markdown(f"**[🚀 Complete Setup in Pipedream →]({st.session_state.workflow_url})**")
+            st.markdown(f"**[🚀 Complete Setup in Pipedream →]({state.workflow_url})**")
         
         st.markdown("""
         **What you've accomplished:**
@@ -1645,22 +1887,16 @@ def show_step5_automation_setup(config):
         # Action buttons
         col1, col2, col3 = st.columns(3)
         with col1:
-            if st.button("📊 View Visual Insights", use_container_width=True):
-                st.session_state.goto_insights = True
-                st.rerun()
+            st.button("📊 View Visual Insights", use_container_width=True,
+                      on_click=go_to_page, args=("📈 Visual Insights",))
         
         with col2:
-            if st.button("🔄 Run New Analysis", use_container_width=True):
-                # Reset for new analysis but keep automation config
-                st.session_state.selected_brands = []
-                if 'analysis_insights' in st.session_state:
-                    del st.session_state.analysis_insights
-                st.rerun()
+            # Reset for new analysis but keep automation config
+            st.button("🔄 Run New Analysis", use_container_width=True, on_click=reset_analysis)
         
         with col3:
-            if st.button("📄 View All Reports", use_container_width=True):
-                st.session_state.goto_reports = True
-                st.rerun()
+            st.button("📄 View All Reports", use_container_width=True,
+                      on_click=go_to_page, args=("📄 View Reports",))
 
 def show_quick_setup():
     """Quick setup page for session-based API keys"""
@@ -1671,96 +1907,94 @@ def show_quick_setup():
     Your keys are only stored for this session and will be cleared when you close your browser.
     """)
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("### 🔍 Apify API Key")
-        temp_apify_key = st.text_input(
-            "Apify API Token",
-            value=st.session_state.get('temp_apify_key', ''),
-            type="password",
-            help="Get your token from console.apify.com/account/integrations",
-            key="apify_input"
-        )
-        st.markdown("[Get Apify API Key →](https://console.apify.com/account/integrations)")
+    # One form so typing/pasting keys doesn't rerun the app until Save
+    with st.form("quick_setup_form"):
+        col1, col2 = st.columns(2)
         
+        with col1:
+            st.markdown("### 🔍 Apify API Key")
+            temp_apify_key = st.text_input(
+                "Apify API Token",
+                type="password",
+                placeholder=key_placeholder('temp_apify_key', ""),
+                help="Get your token from console.apify.com/account/integrations",
+                key="apify_input"
+            )
+            st.markdown("[Get Apify API Key →](https://console.apify.com/account/integrations)")
+        
+        with col2:
+            st.markdown("### 🧠 Claude API Key")
+            temp_claude_key = st.text_input(
+                "Claude API Key",
+                type="password",
+                placeholder=key_placeholder('temp_claude_key', ""),
+                help="Get your key from console.anthropic.com",
+                key="claude_input"
+            )
+            st.markdown("[Get Claude API Key →](https://console.anthropic.com)")
+        
+        # Quick brand setup
+        st.markdown("### 🎯 Quick Brand Setup")
+        st.markdown("Add a brand to analyze (you can add more in Brand Management):")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            quick_brand_name = st.text_input("Brand Name", placeholder="e.g., Athletic Greens")
+            quick_facebook_id = st.text_input("Facebook Page ID", placeholder="e.g., 183869772601")
+        
+        with col2:
+            quick_domain = st.text_input("Company Domain", placeholder="e.g., drinkag1.com")
+        
+        submitted = st.form_submit_button("💾 Save Keys & Add Brand")
+    
+    if submitted:
         if temp_apify_key:
             st.session_state.temp_apify_key = temp_apify_key
             st.success("✅ Apify API key set for this session")
-    
-    with col2:
-        st.markdown("### 🧠 Claude API Key")
-        temp_claude_key = st.text_input(
-            "Claude API Key",
-            value=st.session_state.get('temp_claude_key', ''),
-            type="password",
-            help="Get your key from console.anthropic.com",
-            key="claude_input"
-        )
-        st.markdown("[Get Claude API Key →](https://console.anthropic.com)")
-        
         if temp_claude_key:
             st.session_state.temp_claude_key = temp_claude_key
             st.success("✅ Claude API key set for this session")
-    
-    # Quick brand setup
-    st.markdown("### 🎯 Quick Brand Setup")
-    st.markdown("Add a brand to analyze (you can add more in Brand Management):")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        quick_brand_name = st.text_input("Brand Name", placeholder="e.g., Athletic Greens")
-        quick_facebook_id = st.text_input("Facebook Page ID", placeholder="e.g., 183869772601")
-    
-    with col2:
-        quick_domain = st.text_input("Company Domain", placeholder="e.g., drinkag1.com") 
-        if st.button("➕ Add Quick Brand"):
-            if quick_brand_name and (quick_facebook_id or quick_domain):
-                # Store in session state
-                if 'quick_brands' not in st.session_state:
-                    st.session_state.quick_brands = {}
-                
-                st.session_state.quick_brands[quick_brand_name] = {
-                    "facebook_id": quick_facebook_id,
-                    "domain": quick_domain,
-                    "active": True
-                }
+        
+        if quick_brand_name and (quick_facebook_id or quick_domain):
+            quick_brand = {
+                "facebook_id": quick_facebook_id,
+                "domain": quick_domain,
+                "active": True
+            }
+            quick_brands = st.session_state.setdefault('quick_brands', {})
+            if quick_brands.get(quick_brand_name) == quick_brand:
+                st.info(f"{quick_brand_name} is already added like this")
+            else:
+                # Store in session state - everything below renders after this, so no rerun needed
+                quick_brands[quick_brand_name] = quick_brand
                 st.success(f"✅ Added {quick_brand_name} for this session")
-                st.rerun()
     
     # Show session brands
-    if 'quick_brands' in st.session_state and st.session_state.quick_brands:
+    session_brands = st.session_state.get('quick_brands')
+    if session_brands:
         st.markdown("#### Session Brands:")
-        for brand_name, brand_config in st.session_state.quick_brands.items():
+        for brand_name, brand_config in session_brands.items():
             st.write(f"🏢 **{brand_name}** - {brand_config.get('domain', 'No domain')}")
     
     # Status check
     st.markdown("### ✅ Setup Status")
     
-    has_apify = 'temp_apify_key' in st.session_state and st.session_state.temp_apify_key
-    has_claude = 'temp_claude_key' in st.session_state and st.session_state.temp_claude_key
-    has_brands = 'quick_brands' in st.session_state and st.session_state.quick_brands
+    status = session_status()
     
-    if has_apify:
-        st.success("✅ Apify API key configured")
-    else:
-        st.error("❌ Apify API key needed")
+    all_ready = status.apify and status.claude and status.brands
     
-    if has_claude:
-        st.success("✅ Claude API key configured")  
-    else:
-        st.error("❌ Claude API key needed")
-    
-    if has_brands:
-        st.success(f"✅ {len(st.session_state.quick_brands)} brand(s) configured")
-    else:
-        st.warning("⚠️ No brands configured yet")
+    # One collapsible status element instead of a row of alerts
+    with st.status("Setup readiness", state="complete" if all_ready else "error", expanded=not all_ready):
+        st.write("✅ Apify API key configured" if status.apify else "❌ Apify API key needed")
+        st.write("✅ Claude API key configured" if status.claude else "❌ Claude API key needed")
+        if status.brands:
+            st.write(f"✅ {len(st.session_state.quick_brands)} brand(s) configured")
+        else:
+            st.write("⚠️ No brands configured yet")
     
-    if has_apify and has_claude and has_brands:
+    if all_ready:
         st.success("🎉 **Ready to run analysis!** Go to 'Run Analysis' page.")
-        if st.button("🚀 Go to Analysis Page"):
-            st.session_state.page_redirect = "📊 Run Analysis"
-            st.rerun()
+        st.button("🚀 Go to Analysis Page", on_click=go_to_step, args=(3,))
 
 def show_dashboard(config):
     """Dashboard overview"""
@@ -1770,63 +2004,56 @@ def show_dashboard(config):
     if is_using_secrets():
         st.info("👥 **Multi-User Mode**: This is a shared tool. Use '🔑 Quick Setup' to enter your own API keys and analyze any brands you want!")
     
-    # Quick stats
-    col1, col2, col3, col4 = st.columns(4)
-    
-    active_brands = sum(1 for brand in config["brands"].values() if brand.get("active", True))
-    total_brands = len(config["brands"])
-    
-    with col1:
-        st.metric("Active Brands", active_brands)
-    
-    with col2:
-        st.metric("Total Brands", total_brands)
-    
-    with col3:
-        lookback_days = config["analysis"]["lookback_days"]
-        st.metric("Lookback Days", lookback_days)
-    
-    with col4:
-        recent_reports = get_recent_reports()
-        st.metric("Recent Reports", len(recent_reports))
+    # One pass over the brands gives both the active count and the table rows
+    active_rows = [
+        {"Brand": brand_name, "Domain": brand_config.get('domain', 'N/A'), "Status": "🟢 Available"}
+        for brand_name, brand_config in config["brands"].items()
+        if brand_config.get("active", True)
+    ]
+    
+    # Quick stats - computed up front, rendered in one loop
+    stats = (
+        ("Active Brands", len(active_rows)),
+        ("Total Brands", len(config["brands"])),
+        ("Lookback Days", config["analysis"]["lookback_days"]),
+        ("Recent Reports", len(get_recent_reports())),
+    )
+    for col, (label, value) in zip(st.columns(len(stats)), stats):
+        col.metric(label, value)
     
     # Configuration status
     st.markdown('<h3 class="section-header">🔧 Configuration Status</h3>', unsafe_allow_html=True)
     
-    # Check session vs default config
-    has_session_keys = ('temp_apify_key' in st.session_state and st.session_state.temp_apify_key) or \
-                      ('temp_claude_key' in st.session_state and st.session_state.temp_claude_key)
+    # Check session vs default config in one pass
+    configured_keys = [label for key, label in SESSION_API_KEYS if st.session_state.get(key)]
     
-    if has_session_keys:
-        st.success("🔑 **Using your personal API keys** (session-based)")
-        if 'temp_apify_key' in st.session_state and st.session_state.temp_apify_key:
-            st.write("✅ Your Apify API configured")
-        if 'temp_claude_key' in st.session_state and st.session_state.temp_claude_key:
-            st.write("✅ Your Claude API configured")
-    else:
-        st.warning("⚠️ **No personal API keys set** - You'll need your own keys to run analysis")
-        st.markdown("Go to '🔑 Quick Setup' to enter your API keys")
+    label = "🔑 Using your personal API keys (session-based)" if configured_keys else "⚠️ No personal API keys set"
+    with st.status(label, state="complete" if configured_keys else "error", expanded=not configured_keys):
+        if configured_keys:
+            for key_label in configured_keys:
+                st.write(f"✅ Your {key_label} API configured")
+        else:
+            st.write("You'll need your own keys to run analysis")
+            st.markdown("Go to '🔑 Quick Setup' to enter your API keys")
     
     # Show session brands if any
-    if 'quick_brands' in st.session_state and st.session_state.quick_brands:
+    quick_brands = st.session_state.get('quick_brands')
+    if quick_brands:
         st.markdown("### 🎯 Your Session Brands")
-        for brand_name in st.session_state.quick_brands:
-            st.write(f"• {brand_name}")
+        st.dataframe(pd.DataFrame([
+            {"Brand": brand_name, "Domain": brand_config.get("domain", "N/A")}
+            for brand_name, brand_config in quick_brands.items()
+        ]), hide_index=True, use_container_width=True)
     
     # Default brands summary
     st.markdown('<h3 class="section-header">📋 Example Brands (Available for Analysis)</h3>', unsafe_allow_html=True)
     st.markdown("*These are pre-configured brands that anyone can analyze with their own API keys*")
     
-    for brand_name, brand_config in config.get("brands", {}).items():
-        if brand_config.get("active", True):
-            col1, col2, col3 = st.columns([2, 2, 1])
-            with col1:
-                st.write(f"**{brand_name}**")
-            with col2:
-                st.write(f"Domain: {brand_config.get('domain', 'N/A')}")
-            with col3:
-                st.write("🟢 Available")
+    if active_rows:
+        # One table element instead of a row of columns per brand
+        st.dataframe(pd.DataFrame(active_rows), hide_index=True, use_container_width=True)
 
+@st.fragment
 def show_brand_management(config):
     """Brand management interface"""
     st.markdown('<h2 class="section-header">🎯 Brand Management</h2>', unsafe_allow_html=True)
@@ -1848,30 +2075,33 @@ active = true""")
     # Add new brand
     st.markdown("### Add New Brand")
     
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        new_brand_name = st.text_input("Brand Name", placeholder="e.g., Athletic Greens")
-        new_facebook_id = st.text_input("Facebook Page ID", placeholder="e.g., 183869772601")
-    
-    with col2:
-        new_domain = st.text_input("Company Domain", placeholder="e.g., drinkag1.com")
-        new_active = st.checkbox("Active", value=True)
+    with st.form("add_brand_form"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            new_brand_name = st.text_input("Brand Name", placeholder="e.g., Athletic Greens")
+            new_facebook_id = st.text_input("Facebook Page ID", placeholder="e.g., 183869772601")
+        
+        with col2:
+            new_domain = st.text_input("Company Domain", placeholder="e.g., drinkag1.com")
+            new_active = st.checkbox("Active", value=True)
+        
+        submitted = st.form_submit_button("➕ Add Brand")
     
-    if st.button("➕ Add Brand"):
+    if submitted:
         if new_brand_name and (new_facebook_id or new_domain):
+            new_brand = {
+                "facebook_id": new_facebook_id,
+                "domain": new_domain,
+                "active": new_active
+            }
             if is_using_secrets():
                 st.warning("⚠️ Running on Streamlit Cloud - can't save brands. Update secrets.toml manually.")
+            elif config.get("brands", {}).get(new_brand_name) == new_brand:
+                # Nothing to save - skip the write and the full rerun
+                st.info(f"{new_brand_name} is already configured like this")
             else:
-                # Create new config with added brand
-                new_config = dict(config)
-                new_config["brands"] = dict(config.get("brands", {}))
-                new_config["brands"][new_brand_name] = {
-                    "facebook_id": new_facebook_id,
-                    "domain": new_domain,
-                    "active": new_active
-                }
-                if save_config(new_config):
+                if save_brand(config, new_brand_name, new_brand):
                     st.success(f"✅ Added brand: {new_brand_name}")
                     st.rerun()
         else:
@@ -1884,134 +2114,166 @@ active = true""")
         st.info("No brands configured yet. Add your first brand above!")
         return
     
-    for brand_name, brand_config in config["brands"].items():
-        with st.expander(f"🏢 {brand_name}" + (" 🟢" if brand_config.get("active") else " 🔴")):
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                facebook_id = st.text_input(
-                    "Facebook Page ID",
-                    value=brand_config.get("facebook_id", ""),
-                    key=f"fb_{brand_name}"
-                )
-                domain = st.text_input(
-                    "Company Domain",
-                    value=brand_config.get("domain", ""),
-                    key=f"domain_{brand_name}"
-                )
-            
-            with col2:
-                active = st.checkbox(
-                    "Active",
-                    value=brand_config.get("active", True),
-                    key=f"active_{brand_name}"
-                )
-                
-                st.write("")  # Spacing
-                col_update, col_delete = st.columns(2)
-                
-                with col_update:
-                    if st.button("💾 Update", key=f"update_{brand_name}"):
-                        if is_using_secrets():
-                            st.warning("⚠️ Running on Streamlit Cloud - can't save brands. Update secrets.toml manually.")
-                        else:
-                            # Create new config with updated brand
-                            new_config = dict(config)
-                            new_config["brands"] = dict(config.get("brands", {}))
-                            new_config["brands"][brand_name] = {
-                                "facebook_id": facebook_id,
-                                "domain": domain,
-                                "active": active
-                            }
-                            if save_config(new_config):
-                                st.success(f"✅ Updated {brand_name}")
-                                st.rerun()
-                
-                with col_delete:
-                    if st.button("🗑️ Delete", key=f"delete_{brand_name}"):
-                        if is_using_secrets():
-                            st.warning("⚠️ Running on Streamlit Cloud - can't delete brands. Update secrets.toml manually.")
-                        else:
-                            # Create new config without this brand
-                            new_config = dict(config)
-                            new_config["brands"] = dict(config.get("brands", {}))
-                            del new_config["brands"][brand_name]
-                            if save_config(new_config):
-                                st.success(f"✅ Deleted {brand_name}")
-                                st.rerun()
+    # One table for every brand, editor widgets only for the brand being edited
+    st.dataframe(pd.DataFrame([
+        {
+            "Brand": brand_name,
+            "Facebook ID": brand_config.get("facebook_id", ""),
+            "Domain": brand_config.get("domain", ""),
+            "Status": "🟢 Active" if brand_config.get("active") else "🔴 Inactive"
+        }
+        for brand_name, brand_config in config["brands"].items()
+    ]), hide_index=True, use_container_width=True)
+    
+    # Forget a selection whose brand was just deleted
+    if st.session_state.get("brand_to_edit") not in config["brands"]:
+        st.session_state.pop("brand_to_edit", None)
+    brand_name = st.selectbox("✏️ Edit brand", list(config["brands"]), key="brand_to_edit")
+    brand_editor(config, brand_name, config["brands"][brand_name])
 
-def show_settings(config):
-    """Settings configuration"""
-    st.markdown('<h2 class="section-header">⚙️ Settings</h2>', unsafe_allow_html=True)
-    
-    # API Configuration
-    st.markdown("### 🔑 API Configuration")
-    
+def brand_widget_keys(brand_name: str) -> SimpleNamespace:
+    """Widget keys for one brand's editor, built in one place so they stay unique"""
+    return SimpleNamespace(
+        facebook_id=f"fb_{brand_name}",
+        domain=f"domain_{brand_name}",
+        active=f"active_{brand_name}",
+        update=f"update_{brand_name}",
+        delete=f"delete_{brand_name}"
+    )
+
+@st.fragment
+def brand_editor(config: Dict, brand_name: str, brand_config: Dict):
+    """Edit one brand (its own fragment, so typing here doesn't rerun the other brands)"""
+    keys = brand_widget_keys(brand_name)
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("**Apify API**")
-        apify_token = st.text_input(
-            "API Token",
-            value=config.get("apify", {}).get("api_token", ""),
-            type="password",
-            help="Your Apify API token for Facebook ad scraping"
+        facebook_id = st.text_input(
+            "Facebook Page ID",
+            value=brand_config.get("facebook_id", ""),
+            key=keys.facebook_id
         )
-        st.markdown("*Get token from: [console.apify.com](https://console.apify.com/account/integrations)*")
-    
-    with col2:
-        st.markdown("**Claude API**")
-        claude_key = st.text_input(
-            "API Key",
-            value=config.get("claude", {}).get("api_key", ""),
-            type="password",
-            help="Your Anthropic Claude API key"
-        )
-    
-    # Analysis Settings
-    st.markdown("### 📊 Analysis Settings")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        lookback_days = st.number_input(
-            "Lookback Days",
-            min_value=1,
-            max_value=90,
-            value=config.get("analysis", {}).get("lookback_days", 7),
-            help="How many days back to search for new ads"
+        domain = st.text_input(
+            "Company Domain",
+            value=brand_config.get("domain", ""),
+            key=keys.domain
         )
     
     with col2:
-        max_ads = st.number_input(
-            "Max Ads per Brand",
-            min_value=1,
-            max_value=50,
-            value=config.get("analysis", {}).get("max_ads_per_brand", 10),
-            help="Maximum number of ads to analyze per brand"
-        )
-    
-    # Notification Settings
-    st.markdown("### 📱 Notifications")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        webhook_url = st.text_input(
-            "Webhook URL",
-            value=config.get("notifications", {}).get("webhook_url", ""),
-            help="Pipedream webhook URL for Slack notifications"
+        active = st.checkbox(
+            "Active",
+            value=brand_config.get("active", True),
+            key=keys.active
         )
+        
+        st.write("")  # Spacing
+        col_update, col_delete = st.columns(2)
+        
+        with col_update:
+            if st.button("💾 Update", key=keys.update):
+                updated_brand = {
+                    "facebook_id": facebook_id,
+                    "domain": domain,
+                    "active": active
+                }
+                if is_using_secrets():
+                    st.warning("⚠️ Running on Streamlit Cloud - can't save brands. Update secrets.toml manually.")
+                elif updated_brand == {"facebook_id": brand_config.get("facebook_id", ""),
+                                       "domain": brand_config.get("domain", ""),
+                                       "active": brand_config.get("active", True)}:
+                    # Nothing changed - skip the write and the full rerun
+                    st.info("No changes to save")
+                else:
+                    if save_brand(config, brand_name, updated_brand):
+                        st.success(f"✅ Updated {brand_name}")
+                        st.rerun()
+        
+        with col_delete:
+            if st.button("🗑️ Delete", key=keys.delete):
+                if is_using_secrets():
+                    st.warning("⚠️ Running on Streamlit Cloud - can't delete brands. Update secrets.toml manually.")
+                else:
+                    if save_brand(config, brand_name, None):
+                        st.success(f"✅ Deleted {brand_name}")
+                        st.rerun()
+
+@st.fragment
+def show_settings(config):
+    """Settings configuration"""
+    st.markdown('<h2 class="section-header">⚙️ Settings</h2>', unsafe_allow_html=True)
     
-    with col2:
-        notifications_enabled = st.checkbox(
-            "Enable Notifications",
-            value=config.get("notifications", {}).get("enabled", True),
-            help="Send reports via webhook"
-        )
+    # One form so edits only rerun the app when saved
+    with st.form("settings_form"):
+        # API Configuration
+        st.markdown("### 🔑 API Configuration")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("**Apify API**")
+            apify_token = st.text_input(
+                "API Token",
+                value=config.get("apify", {}).get("api_token", ""),
+                type="password",
+                help="Your Apify API token for Facebook ad scraping"
+            )
+            st.markdown("*Get token from: [console.apify.com](https://console.apify.com/account/integrations)*")
+        
+        with col2:
+            st.markdown("**Claude API**")
+            claude_key = st.text_input(
+                "API Key",
+                value=config.get("claude", {}).get("api_key", ""),
+                type="password",
+                help="Your Anthropic Claude API key"
+            )
+        
+        # Analysis Settings
+        st.markdown("### 📊 Analysis Settings")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            lookback_days = st.number_input(
+                "Lookback Days",
+                min_value=1,
+                max_value=90,
+                value=config.get("analysis", {}).get("lookback_days", 7),
+                help="How many days back to search for new ads"
+            )
+        
+        with col2:
+            max_ads = st.number_input(
+                "Max Ads per Brand",
+                min_value=1,
+                max_value=50,
+                value=config.get("analysis", {}).get("max_ads_per_brand", 10),
+                help="Maximum number of ads to analyze per brand"
+            )
+        
+        # Notification Settings
+        st.markdown("### 📱 Notifications")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            webhook_url = st.text_input(
+                "Webhook URL",
+                value=config.get("notifications", {}).get("webhook_url", ""),
+                help="Pipedream webhook URL for Slack notifications"
+            )
+        
+        with col2:
+            notifications_enabled = st.checkbox(
+                "Enable Notifications",
+                value=config.get("notifications", {}).get("enabled", True),
+                help="Send reports via webhook"
+            )
+        
+        submitted = st.form_submit_button("💾 Save Settings")
     
     # Save settings
-    if st.button("💾 Save Settings"):
+    if submitted:
         if is_using_secrets():
             st.warning("⚠️ Running on Streamlit Cloud - settings can't be saved locally. Update your secrets.toml instead:")
             st.code(f"""[config.apify]
@@ -2043,35 +2305,29 @@ enabled = {str(notifications_enabled).lower()}""")
                 "brands": config.get("brands", {})
             }
             
-            if save_config(new_config):
+            if all(config.get(section) == values for section, values in new_config.items()):
+                # Nothing changed - skip the write and the full rerun
+                st.info("No changes to save")
+            elif save_config(new_config):
                 st.success("✅ Settings saved successfully!")
                 st.rerun()
             else:
                 st.error("❌ Failed to save settings")
 
+@st.fragment
 def show_run_analysis(config):
     """Run analysis interface"""
     st.markdown('<h2 class="section-header">📊 Run Analysis</h2>', unsafe_allow_html=True)
     
-    # Get session-enhanced config
+    # Get session-enhanced config (includes session brands)
     session_config = get_session_config(config)
     
-    # Check if using session brands
-    if 'quick_brands' in st.session_state and st.session_state.quick_brands:
-        session_config['brands'] = {**session_config.get('brands', {}), **st.session_state.quick_brands}
-    
     # Check configuration
-    missing_config = []
-    if not session_config.get("apify", {}).get("api_token"):
-        missing_config.append("Apify API token")
-    if not session_config.get("claude", {}).get("api_key"):
-        missing_config.append("Claude API key")
+    missing_config = [label for section, key, label in REQUIRED_API_CONFIG
+                      if not session_config.get(section, {}).get(key)]
     
     if missing_config:
-        st.error(f"❌ Missing configuration: {', '.join(missing_config)}")
-        st.markdown("### Quick Fix Options:")
-        st.markdown("1. **New users**: Go to '🔑 Quick Setup' to enter your API keys")
-        st.markdown("2. **Existing users**: Configure keys in 'Settings' page")
+        st.error(MISSING_CONFIG_HELP.format(missing=', '.join(missing_config)))
         return
     
     # Analysis options
@@ -2080,7 +2336,7 @@ def show_run_analysis(config):
     col1, col2 = st.columns(2)
     
     with col1:
-        active_brands = [name for name, conf in session_config.get("brands", {}).items() if conf.get("active", True)]
+        active_brands = get_active_brands(session_config.get("brands", {}))
         
         if not active_brands:
             st.error("❌ No active brands configured.")
@@ -2102,74 +2358,65 @@ def show_run_analysis(config):
             help="Send results via webhook to Slack"
         )
     
-    # Run analysis
-    if st.button("🚀 Run Analysis", type="primary"):
-        if "analysis_running" not in st.session_state:
-            st.session_state.analysis_running = False
+    # Keep last results across reruns
+    st.session_state.setdefault("last_analysis_report", None)
+    
+    # Outcome of a background analysis that just finished (stored by main)
+    outcome = st.session_state.pop('analysis_outcome', None)
+    if outcome is not None:
+        if outcome.error is not None:
+            st.error(f"❌ Analysis error: {outcome.error}")
+        elif outcome.no_brands:
+            st.error("❌ No active brands matched this analysis.")
+        elif outcome.report:
+            st.success("✅ Analysis completed successfully!")
+        else:
+            st.error("❌ Analysis failed. Check logs for details.")
+    
+    # The button is swapped out while a run is going so a double click can't start another
+    run_slot = st.empty()
+    if 'analysis_job' not in st.session_state and run_slot.button("🚀 Run Analysis", type="primary"):
+        # Override notification setting if disabled
+        if not include_notifications:
+            session_config["notifications"]["enabled"] = False
         
-        if not st.session_state.analysis_running:
-            st.session_state.analysis_running = True
-            
-            with st.spinner("Running competitive intelligence analysis..."):
-                try:
-                    # Initialize tool with session config
-                    intel = CompetitiveIntel()
-                    intel.config = session_config
-                    
-                    # Override notification setting if disabled
-                    if not include_notifications:
-                        intel.config["notifications"]["enabled"] = False
-                    
-                    # Run analysis
-                    brand_to_analyze = None if brand_filter == "All Active Brands" else brand_filter
-                    
-                    # Capture progress
-                    progress_container = st.empty()
-                    
-                    with progress_container.container():
-                        st.info("🔄 Starting analysis...")
-                        report, insights = intel.run_analysis(brand_to_analyze)
-                    
-                    if report:
-                        st.success("✅ Analysis completed successfully!")
-                        
-                        # Store insights in session state for visual dashboard
-                        st.session_state.analysis_insights = insights
-                        
-                        # Show summary metrics
-                        total_ads = sum(brand_insights.get('performance_indicators', {}).get('total_ads', 0) 
-                                      for brand_insights in insights.values())
-                        st.metric("Total Ads Analyzed", total_ads)
-                        
-                        # Show report preview
-                        st.markdown("### 📄 Report Preview")
-                        st.markdown(report[:1000] + "..." if len(report) > 1000 else report)
-                        
-                        # Action buttons
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.download_button(
-                                "📥 Download Full Report",
-                                data=report,
-                                file_name=f"competitive_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
-                                mime="text/markdown"
-                            )
-                        with col2:
-                            if st.button("📈 View Visual Insights"):
-                                st.session_state.page_redirect = "📈 Visual Insights"
-                                st.rerun()
-                        with col3:
-                            if insights:
-                                st.success(f"📊 {len(insights)} brands analyzed")
-                    else:
-                        st.error("❌ Analysis failed. Check logs for details.")
-                        
-                except Exception as e:
-                    st.error(f"❌ Analysis error: {str(e)}")
-                
-                finally:
-                    st.session_state.analysis_running = False
+        brand_to_analyze = None if brand_filter == "All Active Brands" else brand_filter
+        start_analysis(brand_to_analyze, session_config)
+        run_slot.empty()
+    
+    if 'analysis_job' in st.session_state:
+        show_analysis_progress()
+    
+    # Show last results on every rerun without re-running the analysis
+    report = st.session_state.last_analysis_report
+    if report:
+        insights = st.session_state.get('analysis_insights', {})
+        
+        # Show summary metrics
+        total_ads = aggregate_insights(insights)['performance_indicators']['total_ads']
+        st.metric("Total Ads Analyzed", total_ads)
+        
+        # Show report preview
+        st.markdown("### 📄 Report Preview")
+        # Plain text - the full report is rendered on download/View Full instead
+        st.text(report[:1000] + "..." if len(report) > 1000 else report)
+        
+        # Action buttons
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button(
+                "📥 Download Full Report",
+                data=partial(report.encode, "utf-8"),  # Sent only when clicked
+                file_name=f"competitive_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
+                mime="text/markdown"
+            )
+        with col2:
+            st.button("📈 View Visual Insights", on_click=go_to_page, args=("📈 Visual Insights",))
+        with col3:
+            if insights:
+                st.success(f"📊 {len(insights)} brands analyzed")
 
+@st.fragment
 def show_reports():
     """View recent reports"""
     st.markdown('<h2 class="section-header">📄 Recent Reports</h2>', unsafe_allow_html=True)
@@ -2182,23 +2429,18 @@ def show_reports():
     
     st.write(f"Found {len(reports)} recent reports:")
     
-    for report_path in reports:
-        filename = os.path.basename(report_path)
-        file_time = datetime.fromtimestamp(os.path.getmtime(report_path))
-        
-        with st.expander(f"📄 {filename} - {file_time.strftime('%Y-%m-%d %H:%M')}"):
+    for report_path, filename, mtime, modified in reports:
+        with st.expander(f"📄 {filename} - {modified}"):
             try:
-                with open(report_path, "r") as f:
-                    content = f.read()
-                
-                # Show preview
-                st.markdown(content[:500] + "..." if len(content) > 500 else content)
+                # Show preview (bounded read) - the full file is only read on demand
+                preview = read_report_preview(report_path, mtime)
+                st.markdown(preview[:500] + "..." if len(preview) > 500 else preview)
                 
                 col1, col2 = st.columns(2)
                 with col1:
                     st.download_button(
                         "📥 Download",
-                        data=content,
+                        data=partial(read_report, report_path, mtime),  # Read only when clicked
                         file_name=filename,
                         mime="text/markdown"
                     )
@@ -2206,7 +2448,7 @@ def show_reports():
                 with col2:
                     if st.button("👁️ View Full", key=f"view_{filename}"):
                         st.markdown("### Full Report")
-                        st.markdown(content)
+                        st.markdown(read_report(report_path, mtime))
                         
             except Exception as e:
                 st.error(f"Error reading report: {str(e)}")
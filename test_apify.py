@@ -5,10 +5,77 @@ to confirm API access and see data format
 """
 
 import requests
+import hashlib
 import json
+import os
 import time
 import sys
 
+# Results of recent runs, so repeat debug runs don't pay for another actor run
+CACHE_DIR = os.path.expanduser("~/.cache/apify_test")
+CACHE_TTL = 3600  # seconds
+
+def get_cache_path(facebook_url, results_limit):
+    """Cache file for one (URL, results limit) pair"""
+    cache_key = hashlib.sha1(f"{facebook_url}|{results_limit}".encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{cache_key}.json")
+
+def load_cached_results(cache_path):
+    """Cached results if they are younger than CACHE_TTL, else None"""
+    try:
+        if time.time() - os.path.getmtime(cache_path) < CACHE_TTL:
+            with open(cache_path) as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+    return None
+
+def save_cached_results(cache_path, ad_count, ads):
+    """Store the ad count and sample ads for later runs"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(cache_path, "w") as f:
+            json.dump({"ad_count": ad_count, "ads": ads}, f)
+    except OSError as e:
+        print(f"⚠️ Could not cache results: {e}")
+
+def print_ads(ad_count, ads):
+    """Print the data format of the sample ads"""
+    print(f"✅ Retrieved {ad_count} ads")
+    
+    if not ads:
+        print("❌ No ads returned from Apify")
+        return False
+    
+    print("\n🔍 FIRST AD DATA STRUCTURE:")
+    first_ad = ads[0]
+    print(f"📋 Available keys: {list(first_ad.keys())}")
+    
+    print(f"\n📄 SAMPLE AD DATA:")
+    for key, value in first_ad.items():
+        if isinstance(value, str):
+            if len(value) > 100:
+                print(f"  {key}: {value[:100]}...")
+            else:
+                print(f"  {key}: {value}")
+        else:
+            print(f"  {key}: {value}")
+    
+    # Show a few more ads for patterns
+    if len(ads) > 1:
+        print(f"\n📊 CHECKING {min(3, len(ads))} ADS FOR PATTERNS:")
+        for i, ad in enumerate(ads[:3]):
+            print(f"\nAd {i+1}:")
+            print(f"  Keys: {list(ad.keys())}")
+            if 'adText' in ad:
+                print(f"  Text: {ad['adText'][:50]}...")
+            if 'headline' in ad:
+                print(f"  Headline: {ad.get('headline', 'N/A')}")
+            if 'link' in ad:
+                print(f"  Link: {ad.get('link', 'N/A')}")
+    
+    return True
+
 def test_apify_api(api_token, facebook_url="https://www.facebook.com/183869772601"):
     """Test Apify Facebook Ad Library scraper"""
     
@@ -23,17 +90,27 @@ def test_apify_api(api_token, facebook_url="https://www.facebook.com/18386977260
         "activeStatus": ""  # Get all ads
     }
     
+    cache_path = get_cache_path(facebook_url, actor_input["resultsLimit"])
+    cached = load_cached_results(cache_path)
+    if cached is not None:
+        print(f"♻️ Cache hit - reusing results from the last hour (delete {cache_path} to re-run)")
+        return print_ads(cached["ad_count"], cached["ads"])
+    
     headers = {
         "Authorization": f"Bearer {api_token}",
         "Content-Type": "application/json"
     }
     
+    # One session for start, polls and results - keeps the connection alive between polls
+    session = requests.Session()
+    session.headers.update(headers)
+    
     try:
         # Start the actor
         print("\n🚀 Starting Apify actor...")
         actor_url = "https://api.apify.com/v2/acts/JJghSZmShuco4j9gJ/runs"
         
-        response = requests.post(actor_url, json=actor_input, headers=headers, timeout=30)
+        response = session.post(actor_url, json=actor_input, timeout=30)
         
         print(f"📥 Start response: {response.status_code}")
         
@@ -52,11 +129,12 @@ def test_apify_api(api_token, facebook_url="https://www.facebook.com/18386977260
         # Wait for completion (max 3 minutes for testing)
         max_wait = 180
         wait_time = 0
+        delay = 2  # Doubles after each poll, capped at 30 seconds
         
         while wait_time < max_wait:
             # Check status
             status_url = f"https://api.apify.com/v2/acts/JJghSZmShuco4j9gJ/runs/{run_id}"
-            status_response = requests.get(status_url, headers=headers, timeout=10)
+            status_response = session.get(status_url, timeout=10)
             
             if status_response.status_code == 200:
                 status_data = status_response.json()
@@ -71,8 +149,10 @@ def test_apify_api(api_token, facebook_url="https://www.facebook.com/18386977260
                     print(f"❌ Actor failed: {status}")
                     return False
             
-            time.sleep(15)  # Wait 15 seconds
-            wait_time += 15
+            # Short runs finish after a quick poll, long runs get polled less often
+            time.sleep(delay)
+            wait_time += delay
+            delay = min(30, delay * 2)
         
         if wait_time >= max_wait:
             print("⏰ Timeout - getting partial results...")
@@ -80,46 +160,22 @@ def test_apify_api(api_token, facebook_url="https://www.facebook.com/18386977260
         # Get results
         print("\n📊 Fetching results...")
         dataset_id = run_data["data"]["defaultDatasetId"]
-        dataset_url = f"https://api.apify.com/v2/datasets/{dataset_id}/items"
+        # JSON Lines, streamed - one ad is parsed at a time instead of buffering the whole payload
+        dataset_url = f"https://api.apify.com/v2/datasets/{dataset_id}/items?format=jsonl"
         
-        results_response = requests.get(dataset_url, headers=headers, timeout=30)
+        results_response = session.get(dataset_url, timeout=30, stream=True)
         
         if results_response.status_code == 200:
-            ads = results_response.json()
-            print(f"✅ Retrieved {len(ads)} ads")
-            
+            ads = []  # Only the first few ads are printed, so only those are kept
+            ad_count = 0
+            for line in results_response.iter_lines():
+                if line:
+                    ad_count += 1
+                    if len(ads) < 3:
+                        ads.append(json.loads(line))
             if ads:
-                print("\n🔍 FIRST AD DATA STRUCTURE:")
-                first_ad = ads[0]
-                print(f"📋 Available keys: {list(first_ad.keys())}")
-                
-                print(f"\n📄 SAMPLE AD DATA:")
-                for key, value in first_ad.items():
-                    if isinstance(value, str):
-                        if len(value) > 100:
-                            print(f"  {key}: {value[:100]}...")
-                        else:
-                            print(f"  {key}: {value}")
-                    else:
-                        print(f"  {key}: {value}")
-                
-                # Show a few more ads for patterns
-                if len(ads) > 1:
-                    print(f"\n📊 CHECKING {min(3, len(ads))} ADS FOR PATTERNS:")
-                    for i, ad in enumerate(ads[:3]):
-                        print(f"\nAd {i+1}:")
-                        print(f"  Keys: {list(ad.keys())}")
-                        if 'adText' in ad:
-                            print(f"  Text: {ad['adText'][:50]}...")
-                        if 'headline' in ad:
-                            print(f"  Headline: {ad.get('headline', 'N/A')}")
-                        if 'link' in ad:
-                            print(f"  Link: {ad.get('link', 'N/A')}")
-                
-                return True
-            else:
-                print("❌ No ads returned from Apify")
-                return False
+                save_cached_results(cache_path, ad_count, ads)
+            return print_ads(ad_count, ads)
         else:
             print(f"❌ Failed to get results: {results_response.status_code}")
             print(f"📄 Response: {results_response.text}")
@@ -128,6 +184,8 @@ def test_apify_api(api_token, facebook_url="https://www.facebook.com/18386977260
     except Exception as e:
         print(f"❌ Test failed: {str(e)}")
         return False
+    finally:
+        session.close()
 
 if __name__ == "__main__":
     # Get API token from command line or prompt
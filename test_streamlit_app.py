@@ -0,0 +1,150 @@
+"""
+Navigation tests for the Streamlit app (run with pytest test_streamlit_app.py)
+"""
+
+import os
+import threading
+
+from streamlit.testing.v1 import AppTest
+
+import main
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+
+TEST_CONFIG = {
+    "apify": {"api_token": ""},
+    "claude": {"api_key": ""},
+    "brands": {"AG1": {"facebook_id": "183869772601", "domain": "drinkag1.com", "active": True}},
+    "analysis": {"lookback_days": 7, "max_ads_per_brand": 10},
+    "notifications": {"webhook_url": "", "enabled": False}
+}
+
+def new_session(page_slug=None):
+    """App session using the test config from secrets (so config.json is never touched)"""
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.secrets["config"] = TEST_CONFIG
+    if page_slug:
+        at.query_params["page"] = page_slug
+    return at
+
+def test_deep_link_opens_once_page_unlocks():
+    """A link to a locked page waits on Step 1 and opens once keys and brands are set"""
+    at = new_session("step-3-run-analysis").run()
+    assert not at.exception
+    assert at.sidebar.selectbox[0].value == "1️⃣ Step 1: Enter API Keys"
+    assert at.query_params["page"] == "step-3-run-analysis"
+
+    at.session_state["temp_apify_key"] = "apify_api_test"
+    at.session_state["temp_claude_key"] = "sk-ant-test"
+    at.session_state["selected_brands"] = ["AG1"]
+    at.run()
+    assert not at.exception
+    assert at.sidebar.selectbox[0].value == "3️⃣ Step 3: Run Analysis"
+    assert at.query_params["page"] == "step-3-run-analysis"
+
+def test_url_follows_current_page():
+    """Without a link, the URL tracks the page being shown"""
+    at = new_session().run()
+    assert not at.exception
+    assert at.query_params["page"] == "step-1-enter-api-keys"
+
+def test_show_all_pages_link_is_dropped():
+    """A link to a page only "Show All Pages" unlocks doesn't wait - the URL follows the page shown"""
+    at = new_session("brand-management").run()
+    assert not at.exception
+    assert "_linked_page" not in at.session_state
+    assert at.sidebar.selectbox[0].value == "1️⃣ Step 1: Enter API Keys"
+    assert at.query_params["page"] == "step-1-enter-api-keys"
+
+def test_manual_pick_replaces_pending_link():
+    """Picking a page by hand drops a link still waiting to unlock"""
+    at = new_session("step-3-run-analysis").run()
+    at.session_state["temp_apify_key"] = "apify_api_test"
+    at.session_state["temp_claude_key"] = "sk-ant-test"
+    at.run()
+    assert at.sidebar.selectbox[0].value == "2️⃣ Step 2: Select Brands"
+    assert at.query_params["page"] == "step-3-run-analysis"
+
+    at.sidebar.selectbox[0].select("1️⃣ Step 1: Enter API Keys").run()
+    assert not at.exception
+    assert "_linked_page" not in at.session_state
+    assert at.query_params["page"] == "step-1-enter-api-keys"
+
+def start_ready_session(monkeypatch, run_analysis):
+    """Session with keys and a brand set, with CompetitiveIntel.run_analysis stubbed out"""
+    monkeypatch.setattr(main.CompetitiveIntel, "run_analysis", run_analysis)
+    at = new_session()
+    at.session_state["temp_apify_key"] = "apify_api_test"
+    at.session_state["temp_claude_key"] = "sk-ant-test"
+    at.session_state["selected_brands"] = ["AG1"]
+    at.run()
+    assert at.sidebar.selectbox[0].value == "3️⃣ Step 3: Run Analysis"
+    return at
+
+def blocking_run_analysis(release):
+    """run_analysis stand-in that finishes only once release is set"""
+    def run_analysis(self, brand_filter=None, on_section=None):
+        release.wait(timeout=10)
+        return fake_run_analysis(self, brand_filter, on_section)
+    return run_analysis
+
+def finish_run(at, release):
+    """Let the background run finish, then rerun the app as the progress poller would"""
+    release.set()
+    at.session_state["analysis_job"].future.result(timeout=10)
+    at.run()
+    assert not at.exception
+
+def fake_run_analysis(self, brand_filter=None, on_section=None):
+    """Stand-in for a real analysis run"""
+    on_section("## AG1 analysis")
+    return "# Report", {"AG1": {"performance_indicators": {"total_ads": 3, "active_ads": 2}}}
+
+def success_messages(at):
+    """Texts of the 'Analysis completed' messages on screen"""
+    return [message.value for message in at.success if "Analysis completed" in message.value]
+
+def test_analysis_outcome_shows_once_on_step_3(monkeypatch):
+    """A run finished while watching Step 3 shows its outcome there once, and it doesn't come back"""
+    release = threading.Event()
+    at = start_ready_session(monkeypatch, blocking_run_analysis(release))
+    next(b for b in at.button if "Run Competitive Analysis" in b.label).click().run()
+    finish_run(at, release)
+    assert at.sidebar.selectbox[0].value == "3️⃣ Step 3: Run Analysis"
+    assert success_messages(at)
+    assert at.session_state["last_analysis_report"] == "# Report"
+
+    at.run()
+    assert at.sidebar.selectbox[0].value == "3️⃣ Step 3: Run Analysis"
+    assert not success_messages(at)
+
+    at.sidebar.selectbox[0].select("4️⃣ Step 4: View Results").run()
+    at.sidebar.selectbox[0].select("3️⃣ Step 3: Run Analysis").run()
+    assert not at.exception
+    assert not success_messages(at)
+
+def test_analysis_outcome_dropped_after_leaving_step_3(monkeypatch):
+    """Leaving Step 3 mid-run still stores the results, but no stale outcome shows on return"""
+    release = threading.Event()
+    at = start_ready_session(monkeypatch, blocking_run_analysis(release))
+    next(b for b in at.button if "Run Competitive Analysis" in b.label).click().run()
+    at.sidebar.selectbox[0].select("2️⃣ Step 2: Select Brands").run()
+    finish_run(at, release)
+    assert at.session_state["last_analysis_report"] == "# Report"
+    assert "analysis_outcome" not in at.session_state
+
+    at.sidebar.selectbox[0].select("3️⃣ Step 3: Run Analysis").run()
+    assert not at.exception
+    assert not success_messages(at)
+
+def test_consecutive_page_picks_all_land():
+    """Each sidebar pick opens its page, even straight after another pick"""
+    at = new_session()
+    at.session_state["temp_apify_key"] = "apify_api_test"
+    at.session_state["temp_claude_key"] = "sk-ant-test"
+    at.session_state["selected_brands"] = ["AG1"]
+    at.run()
+    for page in ["2️⃣ Step 2: Select Brands", "1️⃣ Step 1: Enter API Keys", "3️⃣ Step 3: Run Analysis"]:
+        at.sidebar.selectbox[0].select(page).run()
+        assert not at.exception
+        assert at.sidebar.selectbox[0].value == page